@@ -0,0 +1,31 @@
+# ----------------------------
+# Logo, loaded once per process
+# ----------------------------
+# Read from the checkout when present; the URL is only a fallback, so
+# `requests` is imported the first time it is actually needed.
+import io
+from functools import lru_cache
+
+from makk.config import LOGO_PATH, LOGO_URL
+
+
+@lru_cache(maxsize=1)
+def logo_bytes():
+    try:
+        with open(LOGO_PATH, "rb") as f:
+            return f.read()
+    except OSError:
+        pass
+    try:
+        import requests
+        r = requests.get(LOGO_URL, timeout=5)
+        r.raise_for_status()
+        return r.content
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=1)
+def logo_size():
+    from PIL import Image as PILImage
+    return PILImage.open(io.BytesIO(logo_bytes())).size
@@ -0,0 +1,169 @@
+# ----------------------------
+# Shared config for both pages
+# ----------------------------
+# Plain constants only, so importing this stays cheap; Python's module
+# cache means it is built once per process, not on every rerun.
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# ----------------------------
+# Company config
+# ----------------------------
+COMPANY_NAME = "MAKK CROSS BORDER SOLUTIONS LTD."
+COMPANY_ADDR = "14278 VALLEY BLVD UNIT A CITY OF INDUSTRY CA 91746"
+COMPANY_PHONE = "626-601-6131"
+PAYABLE_NOTE = "MAKE ALL CHECKS PAYABLE TO MAKK CROSS BORDER SOLUTIONS LTD."
+THANK_YOU = "Thank you for your business!"
+LOGO_URL = "https://raw.githubusercontent.com/emikuo17/shipwithbtr/main/logo.jpg"
+LOGO_PATH = os.path.join(ROOT, "logo.jpg")
+
+# Delivery order letterhead
+DO_COMPANY_ADDR1 = "14278 VALLEY BLVD UNIT A"
+DO_COMPANY_ADDR2 = "LA PUENTE, CA 91746, UNITED STATES"
+DO_COMPANY_TEL   = "TEL: 626-601-6131"
+DO_COMPANY_EMAIL = "EMAIL: mark.chung@bester.com.tw"
+
+# ----------------------------
+# Payment info
+# ----------------------------
+PAYMENT_INFO = [
+    ("BUSINESS NAME", "MAKK CROSS BORDER SOLUTIONS LTD."),
+    ("ACCOUNT NUMBER", "157536489329"),
+    ("ACH ROUTING NUMBER", "122235821"),
+    ("BANK NAME", "US BANK"),
+    ("SWIFT CODE", "USBKUS44IMT"),
+    ("BANK ADDRESS", "17501 Colima Rd Suite A, City of Industry, CA 91748"),
+    ("BANK PHONE NUMBER", "(626) 923-5259"),
+    ("ZELLE", "626-601-6131 (MAKK CROSS BORDER SOLUTIONS LTD)"),
+]
+
+# ----------------------------
+# Delivery order fields
+# ----------------------------
+# Everything build_pdf() in makk.do_pdf takes besides issued_at, with the
+# values a new DO starts from
+DO_TEXT_FIELDS = (
+    "issued_by", "prepared_by", "mawb_no", "hawb_no", "our_ref",
+    "shipper", "carrier", "consignee", "flight_no", "trucker_name",
+    "place_of_receipt", "receipt_etd", "port_of_loading", "loading_etd",
+    "port_of_discharge", "discharge_eta", "place_of_delivery", "delivery_eta",
+    "total_packages", "package_type", "port_cutoff", "gross_weight_kg", "gross_weight_lbs",
+    "measurement_cbm", "measurement_cft", "commodity", "po_no",
+    "empty_pickup_loc", "empty_ref_no", "empty_date",
+    "freight_pickup_loc", "freight_ref_no", "freight_date",
+    "delivery_to", "delivery_ref_no", "delivery_date", "bill_to", "bill_ref_no",
+    "instruction",
+)
+DO_DEFAULTS = {
+    **dict.fromkeys(DO_TEXT_FIELDS, ""),
+    "pod_notice": (
+        "P.O.D REQUIRED WITH BILLING INVOICE\n"
+        "PLEASE FAX PROOF OF DELIVERY TO 909-895-7579\n\n"
+        "NOTICE: BAD ORDER PACKAGES MUST BE SIGNED FOR AS IN "
+        "CONDITION RECEIVED.\n\n"
+        "ALL PIER CHARGES FOR ACCOUNT OF RECEIVER UNLESS "
+        "OTHERWISE SPECIFIED."
+    ),
+    "footer_note": "DO NOT BREAK DOWN PALLET",
+    "auto_fit": True,
+}
+
+# ----------------------------
+# Customer directory
+# ----------------------------
+CUSTOMERS = {
+    "-- Select a customer --": {
+        "customer_id": "", "receiver": "", "phone": "", "address": "", "email": ""
+    },
+    "Falcon01 — Falcon Logistics Global Inc.": {
+        "customer_id": "Falcon01",
+        "receiver": "FALCON LOGISTICS GLOBAL INC.",
+        "phone": "",
+        "address": "667 BREA CANYON RD., STE 20B WALNUT, CA 91789",
+        "email": "",
+    },
+    "Baixin 01 — Shenzhen Baixin International Logistics": {
+        "customer_id": "Baixin 01",
+        "receiver": "Shenzhen Baixin International Logistics Co., Ltd. Huangshan Branch",
+        "phone": "",
+        "address": "",
+        "email": "",
+    },
+    "Paradigm01 — Richard Hercoson": {
+        "customer_id": "Paradigm01",
+        "receiver": "Richard Hercoson",
+        "phone": "",
+        "address": "",
+        "email": "",
+    },
+    "DalnoMo LLC": {
+        "customer_id": "DalnoMo LLC",
+        "receiver": "DalnoMo LLC",
+        "phone": "",
+        "address": "",
+        "email": "",
+    },
+    "Advantage Transport Solution Inc.": {
+        "customer_id": "Advantage transport solution inc",
+        "receiver": "Advantage transport solution inc",
+        "phone": "",
+        "address": "",
+        "email": "",
+    },
+}
+
+# ----------------------------
+# Local storage and session budget
+# ----------------------------
+DATA_DIR = os.environ.get("MAKK_DATA_DIR", os.path.join(ROOT, "data"))
+
+# In-memory drafts across all sessions of one process; drafts idle longer
+# than DRAFT_IDLE_S are spilled to disk once the budget is exceeded.
+SESSION_BUDGET_BYTES = int(os.environ.get("MAKK_SESSION_BUDGET_MB", "32")) * 1024 * 1024
+DRAFT_IDLE_S = 60
+DRAFT_TTL_S = 7 * 24 * 3600
+SESSION_STATS_TTL_S = 3600  # sessions not seen for this long leave the metrics page
+
+# ----------------------------
+# Outbound email
+# ----------------------------
+SMTP_HOST = os.environ.get("MAKK_SMTP_HOST", "localhost")
+SMTP_PORT = int(os.environ.get("MAKK_SMTP_PORT", "25"))
+SMTP_USER = os.environ.get("MAKK_SMTP_USER", "")
+SMTP_PASSWORD = os.environ.get("MAKK_SMTP_PASSWORD", "")
+SMTP_STARTTLS = os.environ.get("MAKK_SMTP_STARTTLS", "") == "1"
+MAIL_FROM = os.environ.get("MAKK_MAIL_FROM", "mark.chung@bester.com.tw")
+
+SMTP_POOL_SIZE = 4          # persistent connections
+SMTP_BATCH_SIZE = 25        # messages sent per connection checkout
+MAIL_MAX_ATTEMPTS = 5
+MAIL_RETRY_BASE_S = 30      # backoff: 30s, 60s, 120s, ...
+MAIL_RATE_PER_RECIPIENT = 20  # messages per recipient per minute
+MAIL_LEASE_S = 15 * 60      # a 'sending' row older than this is assumed abandoned
+MAIL_RETENTION_S = 30 * 24 * 3600  # delivered/failed mail (and its PDF) is kept this long
+
+# ----------------------------
+# Draft journal
+# ----------------------------
+# Autosaved edits are written and fsynced in batches every JOURNAL_FLUSH_S;
+# a draft's log is compacted to one snapshot past JOURNAL_COMPACT_RECORDS.
+JOURNAL_FLUSH_S = 0.5
+JOURNAL_COMPACT_RECORDS = 500
+
+# ----------------------------
+# Accounting export
+# ----------------------------
+EXPORT_DIR = os.path.join(DATA_DIR, "export")
+EXPORT_CHUNK = 500          # invoices read and written per chunk
+
+# ----------------------------
+# Manifest watch folder
+# ----------------------------
+INGEST_POLL_S = 1.0         # how often the watched folder is scanned
+
+# ----------------------------
+# Render profiling
+# ----------------------------
+PROFILE_DIR = os.path.join(DATA_DIR, "profiles")
+PROFILE_TOP = 25            # functions listed in the UI and on the command line
@@ -0,0 +1,23 @@
+# ----------------------------
+# Local SQLite database
+# ----------------------------
+# One file under DATA_DIR shared by the outbox and reporting tables. Each
+# subsystem passes its own CREATE ... IF NOT EXISTS schema to connect().
+import os
+import sqlite3
+
+from makk.config import DATA_DIR
+
+DB_PATH = os.path.join(DATA_DIR, "makk.db")
+
+
+def connect(schema: str = "", path: str = None) -> sqlite3.Connection:
+    path = path or DB_PATH
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    if schema:
+        conn.executescript(schema)
+    return conn
@@ -0,0 +1,368 @@
+# ----------------------------
+# Delivery order PDF
+# ----------------------------
+# `do` holds the DO page's field values under the same names as the page's
+# variables (issued_at is a date; everything else is text, plus auto_fit).
+import io
+
+from reportlab.lib.pagesizes import LETTER
+from reportlab.lib.units import inch
+from reportlab.lib import colors
+from reportlab.lib.utils import ImageReader
+
+from makk.assets import logo_bytes, logo_size
+from makk.config import (
+    COMPANY_NAME, DO_COMPANY_ADDR1, DO_COMPANY_ADDR2, DO_COMPANY_TEL, DO_COMPANY_EMAIL,
+)
+from makk.helpers import safe_str
+from makk.reproducible import new_canvas
+from makk.textfit import fit_text
+
+
+def build_pdf(do: dict, deterministic: bool = False) -> io.BytesIO:
+    buf = io.BytesIO()
+    c   = new_canvas(buf, LETTER, do, do["issued_at"], deterministic)
+    W, H = LETTER
+    ml  = 0.35 * inch
+    mr  = W - 0.35 * inch
+    TW  = mr - ml
+
+    # ── Helpers ──────────────────────────────────────────────────
+    def hline(yy, x0=ml, x1=mr, lw=0.5):
+        c.setLineWidth(lw)
+        c.line(x0, yy, x1, yy)
+
+    def vline(xx, y0, y1, lw=0.5):
+        c.setLineWidth(lw)
+        c.line(xx, y0, xx, y1)
+
+    def box(x, y, w, h, lw=0.5):
+        c.setLineWidth(lw)
+        c.rect(x, y, w, h)
+
+    def lbl(text, x, yy, size=6):
+        c.setFont("Helvetica", size)
+        c.setFillColor(colors.black)
+        c.drawString(x, yy, safe_str(text))
+
+    def val(text, x, yy, size=8, bold=False):
+        c.setFont("Helvetica-Bold" if bold else "Helvetica", size)
+        c.setFillColor(colors.black)
+        c.drawString(x, yy, safe_str(text))
+
+    def mltext(text, x, yy, max_w, size=7.5, lh=0.145*inch, bottom=None):
+        # bottom: lowest baseline allowed; shrink to fit above it
+        if do["auto_fit"] and bottom is not None:
+            fs, lines = fit_text(text, "Helvetica", max_w, yy - bottom,
+                                 size, MIN_FIT_SIZE, lh / size)
+            c.setFont("Helvetica", fs)
+            c.setFillColor(colors.black)
+            for line in lines:
+                c.drawString(x, yy, line)
+                yy -= lh * fs / size
+            return yy
+
+        c.setFont("Helvetica", size)
+        c.setFillColor(colors.black)
+        for raw_line in safe_str(text).split("\n"):
+            words = raw_line.split()
+            line  = ""
+            for w_ in words:
+                test = (line + " " + w_).strip()
+                if c.stringWidth(test, "Helvetica", size) > max_w:
+                    c.drawString(x, yy, line)
+                    yy -= lh
+                    line = w_
+                else:
+                    line = test
+            if line:
+                c.drawString(x, yy, line)
+                yy -= lh
+        return yy
+
+    PAD  = 0.06 * inch   # inner padding
+    MIN_FIT_SIZE = 5     # smallest auto-fit font size
+    y    = H - 0.28 * inch
+
+    # ════════════════════════════════════════════════════════════
+    # HEADER
+    # ════════════════════════════════════════════════════════════
+    hdr_h   = 1.05 * inch
+    hdr_bot = y - hdr_h
+    mid_hdr = W * 0.52   # left/right split
+
+    # Left: logo + company info
+    logo = logo_bytes()
+    if logo:
+        try:
+            iw, ih = logo_size()
+            lw_  = 0.85 * inch
+            lh_  = lw_ * (ih / iw)
+            c.drawImage(ImageReader(io.BytesIO(logo)),
+                        ml, hdr_bot + (hdr_h - lh_) / 2,
+                        width=lw_, height=lh_, mask="auto")
+        except Exception:
+            pass
+
+    tx = ml + 1.0 * inch
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(tx, y - 0.18*inch, COMPANY_NAME)
+    c.setFont("Helvetica", 7.5)
+    for i, ln in enumerate([DO_COMPANY_ADDR1, DO_COMPANY_ADDR2,
+                             DO_COMPANY_TEL, DO_COMPANY_EMAIL]):
+        c.drawString(tx, y - 0.35*inch - i*0.145*inch, ln)
+    if do["prepared_by"].strip():
+        c.setFont("Helvetica-Bold", 7)
+        c.drawString(tx, y - 0.35*inch - 4*0.145*inch,
+                     f"Prepared by {do['prepared_by']}   "
+                     f"{do['issued_at'].strftime('%m-%d-%Y')} (PDT)")
+
+    # Right: title box + issued row
+    title_top = y - 0.04*inch
+    title_bot = y - 0.60*inch
+    box(mid_hdr, title_bot, mr - mid_hdr, title_top - title_bot, lw=1)
+    c.setFont("Helvetica-Bold", 15)
+    c.drawCentredString((mid_hdr + mr) / 2,
+                        (title_top + title_bot) / 2 - 0.07*inch,
+                        "PICKUP & DELIVERY ORDER")
+
+    iss_top = title_bot
+    iss_bot = iss_top - 0.32*inch
+    iss_mid = (mid_hdr + mr) / 2
+    box(mid_hdr, iss_bot, mr - mid_hdr, iss_top - iss_bot, lw=0.5)
+    vline(iss_mid, iss_bot, iss_top)
+    lbl("ISSUED AT :", mid_hdr + PAD, iss_top - 0.10*inch, size=6)
+    val(do["issued_at"].strftime("%m-%d-%Y"),
+        mid_hdr + PAD, iss_top - 0.22*inch, size=8)
+    lbl("ISSUED BY :", iss_mid + PAD, iss_top - 0.10*inch, size=6)
+    val(do["issued_by"].upper(), iss_mid + PAD, iss_top - 0.22*inch, size=8)
+
+    hline(hdr_bot, lw=1.2)
+    y = hdr_bot
+
+    # ════════════════════════════════════════════════════════════
+    # ROW 1 — TRUCKER (left) | MAWB / HAWB / OUR REF (right)
+    # ════════════════════════════════════════════════════════════
+    R1H   = 0.52 * inch
+    r1bot = y - R1H
+    LCOL  = ml + TW * 0.44   # left/right column split
+
+    box(ml, r1bot, LCOL - ml, R1H)
+    lbl("TRUCKER", ml + PAD, y - 0.10*inch)
+    val(do["trucker_name"].upper(), ml + PAD, y - 0.28*inch, size=9, bold=True)
+
+    rw  = mr - LCOL
+    box(LCOL, r1bot, rw, R1H)
+    h1x = LCOL + rw * 0.45
+    h2x = LCOL + rw * 0.45
+    vline(h1x, r1bot, y)
+    hmid = y - R1H / 2
+    hline(hmid, LCOL, mr)
+
+    lbl("MAWB NO.",      LCOL + PAD,   y - 0.10*inch)
+    lbl("HAWB NO.",      h1x  + PAD,   y - 0.10*inch)
+    val(do["mawb_no"],         LCOL + PAD,   y - 0.24*inch)
+    val(do["hawb_no"],         h1x  + PAD,   y - 0.22*inch, size=10, bold=True)
+    lbl("OUR REF. NO.",  LCOL + PAD,   hmid - 0.10*inch)
+    val(do['our_ref'],         LCOL + PAD,   hmid - 0.24*inch)
+
+    hline(r1bot)
+    y = r1bot
+
+    # ════════════════════════════════════════════════════════════
+    # ROW 2 — EMPTY PICKUP (left) | SHIPPER/CONSIGNEE/CARRIER/FLIGHT (right)
+    # ════════════════════════════════════════════════════════════
+    R2H   = 1.05 * inch
+    r2bot = y - R2H
+
+    box(ml, r2bot, LCOL - ml, R2H)
+    lbl("EMPTY PICK UP LOCATION", ml + PAD, y - 0.10*inch)
+    mltext(do["empty_pickup_loc"], ml + PAD, y - 0.22*inch, LCOL - ml - PAD*2,
+           bottom=r2bot + 0.36*inch)
+    lbl("REF. NO. :", ml + PAD,       r2bot + 0.24*inch, size=6)
+    val(do["empty_ref_no"],  ml + 0.75*inch, r2bot + 0.24*inch)
+    lbl("DATE:",       ml + PAD,       r2bot + 0.10*inch, size=6)
+    val(do["empty_date"],    ml + 0.50*inch, r2bot + 0.10*inch)
+
+    rw  = mr - LCOL
+    hw  = rw / 2
+    rm  = y - R2H / 2
+    box(LCOL, r2bot, rw, R2H)
+    vline(LCOL + hw, r2bot, y)
+    hline(rm, LCOL, mr)
+    lbl("SHIPPER",    LCOL     + PAD, y  - 0.10*inch)
+    lbl("CONSIGNEE",  LCOL+hw  + PAD, y  - 0.10*inch)
+    val(do["shipper"].upper(),   LCOL     + PAD, y  - 0.24*inch, bold=True)
+    val(do["consignee"].upper(), LCOL+hw  + PAD, y  - 0.24*inch, bold=True)
+    lbl("CARRIER",    LCOL     + PAD, rm - 0.10*inch)
+    lbl("FLIGHT NO.", LCOL+hw  + PAD, rm - 0.10*inch)
+    val(do["carrier"],      LCOL     + PAD, rm - 0.24*inch)
+    val(do["flight_no"],    LCOL+hw  + PAD, rm - 0.24*inch)
+
+    hline(r2bot)
+    y = r2bot
+
+    # ════════════════════════════════════════════════════════════
+    # ROW 3 — FREIGHT PICKUP (left) | ROUTING top 2 rows (right)
+    # ════════════════════════════════════════════════════════════
+    R3H   = 1.15 * inch
+    r3bot = y - R3H
+
+    box(ml, r3bot, LCOL - ml, R3H)
+    lbl("FREIGHT PICK UP LOCATION", ml + PAD, y - 0.10*inch)
+    mltext(do["freight_pickup_loc"], ml + PAD, y - 0.22*inch, LCOL - ml - PAD*2,
+           bottom=r3bot + 0.36*inch)
+    lbl("REF. NO. :", ml + PAD,        r3bot + 0.24*inch, size=6)
+    val(do["freight_ref_no"], ml + 0.75*inch, r3bot + 0.24*inch)
+    lbl("DATE:",        ml + PAD,        r3bot + 0.10*inch, size=6)
+    val(do["freight_date"],   ml + 0.50*inch,  r3bot + 0.10*inch)
+
+    rw  = mr - LCOL
+    hw  = rw / 2
+    rm  = y - R3H / 2
+    box(LCOL, r3bot, rw, R3H)
+    vline(LCOL + hw, r3bot, y)
+    hline(rm, LCOL, mr)
+    lbl("PLACE OF RECEIPT", LCOL    + PAD, y  - 0.10*inch)
+    lbl("ETD",              LCOL+hw + PAD, y  - 0.10*inch)
+    val(do["place_of_receipt"],   LCOL    + PAD, y  - 0.24*inch, bold=True)
+    val(do["receipt_etd"],        LCOL+hw + PAD, y  - 0.24*inch)
+    lbl("PORT OF LOADING",  LCOL    + PAD, rm - 0.10*inch)
+    lbl("ETD",              LCOL+hw + PAD, rm - 0.10*inch)
+    val(do["port_of_loading"],    LCOL    + PAD, rm - 0.24*inch, bold=True)
+    val(do["loading_etd"],        LCOL+hw + PAD, rm - 0.24*inch)
+
+    hline(r3bot)
+    y = r3bot
+
+    # ════════════════════════════════════════════════════════════
+    # ROW 4 — DELIVERY TO (left) | PORT OF DISCHARGE / DELIVERY (right)
+    # ════════════════════════════════════════════════════════════
+    R4H   = 1.15 * inch
+    r4bot = y - R4H
+
+    box(ml, r4bot, LCOL - ml, R4H)
+    lbl("LOADED RETURN/DELIVERY TO", ml + PAD, y - 0.10*inch)
+    mltext(do["delivery_to"], ml + PAD, y - 0.22*inch, LCOL - ml - PAD*2,
+           bottom=r4bot + 0.36*inch)
+    lbl("REF. NO. :", ml + PAD,         r4bot + 0.24*inch, size=6)
+    val(do["delivery_ref_no"], ml + 0.75*inch, r4bot + 0.24*inch)
+    lbl("DATE:",         ml + PAD,        r4bot + 0.10*inch, size=6)
+    val(do["delivery_date"],   ml + 0.50*inch,  r4bot + 0.10*inch)
+
+    rw  = mr - LCOL
+    hw  = rw / 2
+    rm  = y - R4H / 2
+    box(LCOL, r4bot, rw, R4H)
+    vline(LCOL + hw, r4bot, y)
+    hline(rm, LCOL, mr)
+    lbl("PORT OF DISCHARGE", LCOL    + PAD, y  - 0.10*inch)
+    lbl("ETA",               LCOL+hw + PAD, y  - 0.10*inch)
+    val(do["port_of_discharge"],   LCOL    + PAD, y  - 0.24*inch, bold=True)
+    val(do["discharge_eta"],       LCOL+hw + PAD, y  - 0.24*inch)
+    lbl("PLACE OF DELIVERY", LCOL    + PAD, rm - 0.10*inch)
+    lbl("ETA",               LCOL+hw + PAD, rm - 0.10*inch)
+    val(do["place_of_delivery"],   LCOL    + PAD, rm - 0.24*inch, bold=True)
+    val(do["delivery_eta"],        LCOL+hw + PAD, rm - 0.24*inch)
+
+    hline(r4bot)
+    y = r4bot
+
+    # ════════════════════════════════════════════════════════════
+    # ROW 5 — BILL TO (left) | CARGO DETAILS (right)
+    # ════════════════════════════════════════════════════════════
+    R5H   = 1.1 * inch
+    r5bot = y - R5H
+
+    box(ml, r5bot, LCOL - ml, R5H)
+    lbl("BILL TO", ml + PAD, y - 0.10*inch)
+    mltext(do["bill_to"], ml + PAD, y - 0.22*inch, LCOL - ml - PAD*2,
+           bottom=r5bot + 0.22*inch)
+    lbl("REF. NO. :", ml + PAD,       r5bot + 0.10*inch, size=6)
+    val(do["bill_ref_no"],  ml + 0.75*inch,  r5bot + 0.10*inch)
+
+    # Cargo right side — 3 rows
+    rw  = mr - LCOL
+    hw  = rw / 2
+    th  = R5H / 3
+    box(LCOL, r5bot, rw, R5H)
+    vline(LCOL + hw, r5bot, y)
+    hline(y - th,    LCOL, mr)
+    hline(y - 2*th,  LCOL, mr)
+
+    # Row a: total packages | port cut-off
+    lbl("TOTAL PACKAGES",  LCOL    + PAD, y - 0.10*inch)
+    lbl("PORT CUT-OFF",    LCOL+hw + PAD, y - 0.10*inch)
+    val(f"{do['total_packages']}  {do['package_type']}".strip(),
+        LCOL + PAD, y - 0.26*inch, bold=True)
+    val(do['port_cutoff'], LCOL+hw + PAD, y - 0.26*inch)
+
+    # Row b: gross weight
+    lbl("GROSS WEIGHT", LCOL + PAD, y - th - 0.10*inch)
+    val(f"{do['gross_weight_kg']} KGS" if do["gross_weight_kg"] else "",
+        LCOL    + PAD, y - th - 0.26*inch)
+    val(f"{do['gross_weight_lbs']} LBS" if do["gross_weight_lbs"] else "",
+        LCOL+hw + PAD, y - th - 0.26*inch)
+
+    # Row c: measurement
+    lbl("MEASUREMENT", LCOL + PAD, y - 2*th - 0.10*inch)
+    val(f"{do['measurement_cbm']} CBM" if do["measurement_cbm"] else "",
+        LCOL    + PAD, y - 2*th - 0.26*inch)
+    val(f"{do['measurement_cft']} CFT" if do["measurement_cft"] else "",
+        LCOL+hw + PAD, y - 2*th - 0.26*inch)
+
+    # Commodity / PO at bottom of cargo box
+    lbl("COMMODITY", LCOL    + PAD, r5bot + 0.30*inch)
+    lbl("PO NO.",    LCOL+hw + PAD, r5bot + 0.30*inch)
+    val(do["commodity"].upper(), LCOL    + PAD, r5bot + 0.12*inch, bold=True)
+    val(do["po_no"],             LCOL+hw + PAD, r5bot + 0.12*inch)
+
+    hline(r5bot, lw=1.2)
+    y = r5bot
+
+    # ════════════════════════════════════════════════════════════
+    # BOTTOM — POD box (left) | Instruction (right)
+    # ════════════════════════════════════════════════════════════
+    BOT_H   = 1.25 * inch
+    bot_bot = y - BOT_H
+    mid_bot = ml + TW * 0.44
+
+    box(ml,      bot_bot, mid_bot - ml,  BOT_H)
+    box(mid_bot, bot_bot, mr - mid_bot,  BOT_H)
+    lbl("INSTRUCTION", mid_bot + PAD, y - 0.10*inch)
+
+    mltext(do["pod_notice"],   ml      + PAD, y - 0.10*inch,
+           mid_bot - ml - PAD*2, size=7.5, bottom=bot_bot + 0.08*inch)
+    mltext(do["instruction"],  mid_bot + PAD, y - 0.22*inch,
+           mr - mid_bot - PAD*2, size=8, bottom=bot_bot + 0.08*inch)
+
+    hline(bot_bot, lw=1.2)
+    y = bot_bot
+
+    # ════════════════════════════════════════════════════════════
+    # FOOTER
+    # ════════════════════════════════════════════════════════════
+    FT_H    = 0.38 * inch
+    ft_bot  = y - FT_H
+    mid_ft  = ml + TW * 0.44
+
+    box(ml,     ft_bot, mid_ft - ml,  FT_H)
+    box(mid_ft, ft_bot, mr - mid_ft,  FT_H)
+
+    c.setFont("Helvetica-Bold", 11)
+    c.drawString(ml + PAD,
+                 ft_bot + FT_H/2 - 0.07*inch,
+                 safe_str(do["footer_note"]))
+
+    c.setFont("Helvetica", 7)
+    c.drawRightString(mr - PAD,
+                      ft_bot + FT_H/2 + 0.03*inch,
+                      "You are requested to inform us immediately of any occurrence.")
+    c.drawRightString(mr - PAD,
+                      ft_bot + FT_H/2 - 0.12*inch,
+                      "Thank You for your service !")
+
+    c.showPage()
+    c.save()
+    buf.seek(0)
+    return buf
@@ -0,0 +1,275 @@
+# ----------------------------
+# Incremental invoice export for accounting
+# ----------------------------
+# Each run exports the invoices issued since the target's watermark (the
+# last exported invoice id) to one CSV or JSON-lines file. Invoices are
+# read by id range in chunks of EXPORT_CHUNK and appended to a .part file,
+# so memory stays flat however many invoices there are and history before
+# the watermark is never read. The run's range, and how far it got, are
+# recorded in export_runs after each chunk, with the invoice and row counts
+# so far. A crashed run resumes from its last chunk and produces the same
+# file, and reports counts for the whole range. The file is renamed into place
+# and the watermark advanced in one transaction only after a complete run.
+#
+# Each invoice carries its status at export time. Invoices paid or voided
+# after they were exported reach accounting through a second file per run,
+# status-<target>-<from>-<to>, listing the ledger's status changes since
+# the "<target>:status" watermark (the last exported change seq).
+#
+#   python -m makk.export                   # CSV of invoices since the last run
+#   python -m makk.export --format jsonl
+#   python -m makk.export --status          # watermarks and unfinished runs
+import argparse
+import csv
+import io
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+from makk import db
+from makk.config import EXPORT_CHUNK, EXPORT_DIR
+from makk.helpers import fsync_dir
+from makk.ledger import Ledger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS export_watermark (
+    target     TEXT PRIMARY KEY,
+    last_id    INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS export_runs (
+    target     TEXT PRIMARY KEY,
+    fmt        TEXT NOT NULL,
+    after_id   INTEGER NOT NULL,
+    upto_id    INTEGER NOT NULL,
+    done_id    INTEGER NOT NULL,
+    offset     INTEGER NOT NULL,
+    path       TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    invoices   INTEGER NOT NULL DEFAULT 0,
+    rows       INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+FORMATS = ("csv", "jsonl")
+CSV_COLUMNS = (
+    "invoice_no", "inv_date", "customer_id", "receiver", "phone", "address",
+    "line_no", "qty", "description", "weight", "unit", "line_total",
+    "subtotal", "sales_tax", "total", "status",
+)
+CHANGE_COLUMNS = ("seq", "invoice_no", "status", "changed_at")
+
+
+def _amount(x: float) -> str:
+    return f"{x:.2f}"
+
+
+def csv_header(columns=CSV_COLUMNS) -> bytes:
+    buf = io.StringIO()
+    csv.writer(buf).writerow(columns)
+    return buf.getvalue().encode("utf-8")
+
+
+def csv_chunk(invoices) -> tuple:
+    # One row per line item, invoice header and totals repeated on each
+    buf, n = io.StringIO(), 0
+    w = csv.writer(buf)
+    for inv in invoices:
+        head = (inv["invoice_no"], inv["inv_date"].isoformat(), inv["customer_id"],
+                inv["receiver"], inv["phone"], inv["address"])
+        totals = (_amount(inv["subtotal"]), _amount(inv["sales_tax"]), _amount(inv["total"]),
+                  inv["status"])
+        lines = [(i + 1, r["Qty"], r["Description"], r["Weight"], r["Unit"],
+                  _amount(r["Line Total (USD)"])) for i, r in enumerate(inv["items"])]
+        for line in lines or [("",) * 6]:
+            w.writerow(head + line + totals)
+            n += 1
+    return buf.getvalue().encode("utf-8"), n
+
+
+def jsonl_chunk(invoices) -> tuple:
+    lines = [json.dumps(inv, default=str, ensure_ascii=False) + "\n" for inv in invoices]
+    return "".join(lines).encode("utf-8"), len(lines)
+
+
+def encode_changes(changes, fmt: str) -> bytes:
+    rows = [{**c, "changed_at": datetime.fromtimestamp(c["changed_at"], timezone.utc)
+             .isoformat(timespec="seconds")} for c in changes]
+    if fmt == "jsonl":
+        return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in rows).encode("utf-8")
+    buf = io.StringIO()
+    csv.writer(buf).writerows([r[c] for c in CHANGE_COLUMNS] for r in rows)
+    return csv_header(CHANGE_COLUMNS) + buf.getvalue().encode("utf-8")
+
+
+class Exporter:
+    def __init__(self, db_path: str = None):
+        self.conn = db.connect(SCHEMA, db_path)
+        cols = {r["name"] for r in self.conn.execute("PRAGMA table_info(export_runs)")}
+        with self.conn:   # runs started before counts were recorded
+            for col in ("invoices", "rows"):
+                if col not in cols:
+                    self.conn.execute(
+                        f"ALTER TABLE export_runs ADD COLUMN {col} INTEGER NOT NULL DEFAULT 0")
+        self.ledger = Ledger(db_path)
+
+    def watermark(self, target: str) -> int:
+        row = self.conn.execute("SELECT last_id FROM export_watermark WHERE target = ?",
+                                (target,)).fetchone()
+        return row[0] if row else 0
+
+    def set_watermark(self, target: str, last_id: int):
+        # Also ends any unfinished run, in the same transaction
+        with self.conn:
+            self.conn.execute("DELETE FROM export_runs WHERE target = ?", (target,))
+            self.conn.execute(
+                "INSERT INTO export_watermark VALUES (?, ?, ?) ON CONFLICT (target)"
+                " DO UPDATE SET last_id = excluded.last_id, updated_at = excluded.updated_at",
+                (target, last_id, time.time()),
+            )
+
+    def status(self) -> list:
+        marks = {r["target"]: r["last_id"] for r in self.conn.execute(
+            "SELECT target, last_id FROM export_watermark")}
+        runs = {r["target"]: dict(r) for r in self.conn.execute("SELECT * FROM export_runs")}
+        return [{"target": t, "last_id": marks.get(t, 0), "run": runs.get(t)}
+                for t in sorted(set(marks) | set(runs))]
+
+    def _start(self, target: str, fmt: str, out_dir: str):
+        # The unfinished run for target, or a new one up to the current last invoice
+        run = self.conn.execute("SELECT * FROM export_runs WHERE target = ?",
+                                (target,)).fetchone()
+        if run is not None:
+            return dict(run)
+        after, upto = self.watermark(target), self.ledger.last_id()
+        if upto <= after:
+            return None
+        run = {
+            "target": target, "fmt": fmt, "after_id": after, "upto_id": upto,
+            "done_id": after, "offset": 0, "started_at": time.time(), "invoices": 0, "rows": 0,
+            "path": os.path.abspath(os.path.join(
+                out_dir, f"invoices-{target}-{after + 1:08d}-{upto:08d}.{fmt}")),
+        }
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO export_runs VALUES (:target, :fmt, :after_id, :upto_id, :done_id,"
+                " :offset, :path, :started_at, :invoices, :rows)",
+                run,
+            )
+        return run
+
+    def run(self, target: str = None, fmt: str = "csv", out_dir: str = EXPORT_DIR,
+            chunk: int = EXPORT_CHUNK) -> dict:
+        # Summary of the run, or None when nothing was issued since the watermark
+        target = target or fmt
+        run = self._start(target, fmt, out_dir)
+        if run is None:
+            return None
+        resumed = run["done_id"] > run["after_id"]
+        path, part = run["path"], run["path"] + ".part"
+        encode = csv_chunk if run["fmt"] == "csv" else jsonl_chunk
+
+        # A finished file without its .part means only the commit was lost
+        if os.path.exists(part) or not os.path.exists(path):
+            if run["offset"] and not (os.path.exists(part)
+                                      and os.path.getsize(part) >= run["offset"]):
+                # partial file lost
+                run.update(done_id=run["after_id"], offset=0, invoices=0, rows=0)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(part, "r+b" if run["offset"] else "wb") as f:
+                f.truncate(run["offset"])   # drop a chunk written after the last checkpoint
+                f.seek(run["offset"])
+                if run["offset"] == 0 and run["fmt"] == "csv":
+                    f.write(csv_header())
+                while True:
+                    batch = self.ledger.issued_between(run["done_id"], run["upto_id"], chunk)
+                    if not batch:
+                        break
+                    data, rows = encode(inv for _, inv in batch)
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                    run["done_id"], run["offset"] = batch[-1][0], f.tell()
+                    run["invoices"] += len(batch)
+                    run["rows"] += rows
+                    with self.conn:
+                        self.conn.execute(
+                            "UPDATE export_runs SET done_id = :done_id, offset = :offset,"
+                            " invoices = :invoices, rows = :rows WHERE target = :target",
+                            run,
+                        )
+            os.replace(part, path)
+            fsync_dir(os.path.dirname(path))
+
+        self.set_watermark(target, run["upto_id"])
+        return {"target": target, "path": path, "from_id": run["after_id"] + 1,
+                "to_id": run["upto_id"], "invoices": run["invoices"], "rows": run["rows"],
+                "resumed": resumed}
+
+    def run_changes(self, target: str = None, fmt: str = "csv",
+                    out_dir: str = EXPORT_DIR) -> dict:
+        # Status changes since the target's change watermark, or None. They
+        # are few, so one file is written in one go; a run that crashes
+        # before the watermark moves rewrites the same file next time.
+        target = target or fmt
+        mark = f"{target}:status"
+        after, upto = self.watermark(mark), self.ledger.last_change_seq()
+        if upto <= after:
+            return None
+        changes = self.ledger.changes_between(after, upto)
+        path = os.path.abspath(os.path.join(
+            out_dir, f"status-{target}-{after + 1:08d}-{upto:08d}.{fmt}"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".part", "wb") as f:
+            f.write(encode_changes(changes, fmt))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".part", path)
+        fsync_dir(os.path.dirname(path))
+        self.set_watermark(mark, upto)
+        return {"target": mark, "path": path, "from_seq": after + 1, "to_seq": upto,
+                "changes": len(changes)}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Export invoices issued since the last run")
+    ap.add_argument("--format", choices=FORMATS, default="csv")
+    ap.add_argument("--target", help="watermark name (default: the format)")
+    ap.add_argument("--out", default=EXPORT_DIR, help="output directory (default: data/export)")
+    ap.add_argument("--chunk", type=int, default=EXPORT_CHUNK, help="invoices per chunk")
+    ap.add_argument("--db", help="database path (default: data/makk.db)")
+    ap.add_argument("--reset-to", type=int, metavar="ID",
+                    help="set the target's watermark to invoice id ID and exit")
+    ap.add_argument("--status", action="store_true", help="show watermarks and exit")
+    args = ap.parse_args(argv)
+
+    ex = Exporter(args.db)
+    target = args.target or args.format
+    if args.status:
+        for r in ex.status():
+            run = r["run"]
+            running = f", unfinished run to #{run['upto_id']} at #{run['done_id']}" if run else ""
+            print(f"{r['target']}: exported up to #{r['last_id']}{running}")
+        return
+    if args.reset_to is not None:
+        ex.set_watermark(target, args.reset_to)
+        print(f"{target}: watermark set to #{args.reset_to}")
+        return
+
+    t0 = time.perf_counter()
+    result = ex.run(target, args.format, args.out, args.chunk)
+    if result is None:
+        print(f"{target}: no invoices issued since #{ex.watermark(target)}")
+    else:
+        print(f"{target}: invoices #{result['from_id']}-#{result['to_id']}"
+              f"{' (resumed)' if result['resumed'] else ''}: {result['invoices']} invoice(s),"
+              f" {result['rows']} row(s) -> {result['path']} in {time.perf_counter() - t0:.2f}s")
+    changes = ex.run_changes(target, args.format, args.out)
+    if changes is not None:
+        print(f"{changes['target']}: status changes #{changes['from_seq']}-#{changes['to_seq']}:"
+              f" {changes['changes']} change(s) -> {changes['path']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+# ----------------------------
+# Helpers
+# ----------------------------
+import os
+
+def money(x: float) -> str:
+    return f"${x:,.2f}"
+
+def safe_float(v) -> float:
+    try:
+        if v is None or v == "":
+            return 0.0
+        return float(v)
+    except Exception:
+        return 0.0
+
+def safe_str(v) -> str:
+    return "" if v is None else str(v)
+
+def fsync_dir(path: str):
+    # Make a create or rename inside path durable (no-op where unsupported)
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
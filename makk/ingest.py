@@ -0,0 +1,331 @@
+# ----------------------------
+# Manifest watch folder
+# ----------------------------
+# Polls a directory for invoice and DO manifests (.csv, or .xlsx when
+# openpyxl is installed) and renders one PDF per document with the usual
+# layouts. Every row is hashed, and a document's hash combines the hashes
+# of its rows with a hash of the layout code, config and logo. On each
+# change to a manifest, only documents whose hash changed are rendered;
+# unchanged ones keep their PDF, and documents whose rows are gone are
+# moved to retired/. The hashes live in makk.db, so a restart re-renders nothing
+# that is already current.
+#
+#   python -m makk.ingest manifests/            # watch
+#   python -m makk.ingest manifests/ --once     # one pass
+#   python -m makk.ingest manifests/ --profile  # also profile each render (makk.profiling)
+#
+# Invoice manifests have one row per line item, grouped by invoice_no, with
+# the columns of the accounting export (invoice_no, inv_date, customer_id,
+# receiver, phone, address, sales_tax, qty, description, weight, unit,
+# line_total). DO manifests have one row per delivery order, with
+# build_pdf()'s field names and issued_at as columns, keyed by our_ref (or
+# mawb_no/hawb_no). Dates come from the manifest, never the clock, so a
+# row renders to the same PDF whenever it is rendered. PDFs go to
+# OUT_DIR/<manifest file name>/.
+import argparse
+import csv
+import hashlib
+import os
+import re
+import time
+from datetime import date, datetime
+
+from makk import assets, db, do_pdf, invoice_pdf
+from makk.config import DO_DEFAULTS, DO_TEXT_FIELDS, INGEST_POLL_S
+from makk.helpers import fsync_dir, safe_float, safe_str
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingest_docs (
+    manifest    TEXT NOT NULL,
+    doc_key     TEXT NOT NULL,
+    doc_hash    TEXT NOT NULL,
+    path        TEXT NOT NULL,
+    rendered_at REAL NOT NULL,
+    PRIMARY KEY (manifest, doc_key)
+);
+"""
+
+MANIFEST_EXTS = (".csv", ".xlsx")
+# Everything a PDF depends on besides its rows: the layouts, the company
+# details and payment info in config.py, and the logo
+_LAYOUT_FILES = ("invoice_pdf.py", "do_pdf.py", "textfit.py", "reproducible.py",
+                 "config.py", "assets.py", "helpers.py")
+
+
+def layout_hash() -> str:
+    # Changes whenever the layout code, config or logo does, so every
+    # document re-renders after such an edit
+    h = hashlib.md5(usedforsecurity=False)
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in _LAYOUT_FILES:
+        with open(os.path.join(here, name), "rb") as f:
+            h.update(f.read())
+    h.update(assets.logo_bytes() or b"")
+    return h.hexdigest()
+
+
+# ----------------------------
+# Reading manifests
+# ----------------------------
+def _cell(v) -> str:
+    if isinstance(v, datetime):
+        v = v.date()
+    if isinstance(v, date):
+        return v.isoformat()
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return safe_str(v).strip()
+
+
+def read_rows(path: str) -> list:
+    # Rows as dicts keyed by lower-cased header, values as stripped strings
+    if path.endswith(".xlsx"):
+        from openpyxl import load_workbook   # optional; only for .xlsx manifests
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            it = wb.worksheets[0].iter_rows(values_only=True)
+            header = [_cell(h).lower() for h in next(it, ())]
+            rows = [dict(zip(header, map(_cell, r))) for r in it]
+        finally:
+            wb.close()
+    else:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.reader(f)
+            header = [h.strip().lower() for h in next(reader, [])]
+            rows = [dict(zip(header, map(_cell, r))) for r in reader]
+    return [r for r in rows if any(r.values())]
+
+
+def manifest_kind(rows) -> str:
+    cols = set(rows[0]) if rows else set()
+    if "invoice_no" in cols:
+        return "invoice"
+    if cols & {"our_ref", "mawb_no", "hawb_no"}:
+        return "do"
+    return None
+
+
+def row_hash(row: dict) -> bytes:
+    blob = "\x1f".join(f"{k}\x1e{row[k]}" for k in sorted(row))
+    return hashlib.md5(blob.encode("utf-8"), usedforsecurity=False).digest()
+
+
+def do_key(row: dict) -> str:
+    return row.get("our_ref") or "/".join(
+        filter(None, (row.get("mawb_no", ""), row.get("hawb_no", ""))))
+
+
+def group_rows(kind: str, rows) -> dict:
+    # doc key -> its rows, in manifest order
+    docs = {}
+    for row in rows:
+        key = row.get("invoice_no", "") if kind == "invoice" else do_key(row)
+        if key:
+            docs.setdefault(key, []).append(row)
+    return docs
+
+
+def parse_date(s: str) -> date:
+    for fmt in ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y"):
+        try:
+            return datetime.strptime(s, fmt).date()
+        except ValueError:
+            pass
+    raise ValueError(f"unrecognised date {s!r}")
+
+
+def to_invoice(rows) -> dict:
+    head = rows[0]
+    items = [{
+        "Qty": int(safe_float(r.get("qty"))),
+        "Description": r.get("description", ""),
+        "Weight": r.get("weight", ""),
+        "Unit": r.get("unit") or "LB",
+        "Line Total (USD)": safe_float(r.get("line_total")),
+    } for r in rows if any(r.get(c) for c in ("qty", "description", "line_total"))]
+    subtotal = float(sum(r["Line Total (USD)"] for r in items))
+    sales_tax = safe_float(head.get("sales_tax"))
+    return {
+        "inv_date": parse_date(head.get("inv_date", "")),
+        "invoice_no": head["invoice_no"],
+        "customer_id": head.get("customer_id", ""),
+        "receiver": head.get("receiver", ""),
+        "phone": head.get("phone", ""),
+        "address": head.get("address", ""),
+        "items": items,
+        "subtotal": subtotal,
+        "sales_tax": sales_tax,
+        "total": round(subtotal + sales_tax, 2),
+        "auto_fit": True,
+    }
+
+
+def to_do(rows) -> dict:
+    row = rows[-1]   # a repeated key: the last row wins
+    do = dict(DO_DEFAULTS)
+    do.update({k: row[k] for k in DO_TEXT_FIELDS + ("pod_notice", "footer_note") if row.get(k)})
+    if row.get("auto_fit"):
+        do["auto_fit"] = row["auto_fit"].lower() in ("1", "true", "yes", "y")
+    if not row.get("issued_at"):
+        raise ValueError("no issued_at date")
+    do["issued_at"] = parse_date(row["issued_at"])
+    return do
+
+
+def file_name(key: str) -> str:
+    name = re.sub(r"[^A-Za-z0-9._-]+", "_", key).strip("._")
+    if name != key:   # keep keys that sanitise alike apart
+        name += "-" + hashlib.md5(key.encode("utf-8"), usedforsecurity=False).hexdigest()[:6]
+    return name
+
+
+# ----------------------------
+# Ingestor
+# ----------------------------
+class Ingestor:
+    def __init__(self, watch_dir: str, out_dir: str = None, db_path: str = None,
+                 profile: bool = False):
+        self.profile = profile
+        self.watch_dir = os.path.abspath(watch_dir)
+        self.out_dir = os.path.abspath(out_dir or os.path.join(watch_dir, "rendered"))
+        self.conn = db.connect(SCHEMA, db_path)
+        self.layout = layout_hash()
+        self._seen = {}   # manifest path -> (mtime_ns, size) last processed
+        self._last = {}   # manifest path -> stat at the previous scan
+
+    def _stored(self, manifest: str) -> dict:
+        return {r["doc_key"]: dict(r) for r in self.conn.execute(
+            "SELECT doc_key, doc_hash, path FROM ingest_docs WHERE manifest = ?", (manifest,))}
+
+    def _retire(self, manifest: str, doc_key: str, path: str):
+        if os.path.exists(path):
+            retired = os.path.join(os.path.dirname(path), "retired")
+            os.makedirs(retired, exist_ok=True)
+            os.replace(path, os.path.join(retired, os.path.basename(path)))
+        with self.conn:
+            self.conn.execute("DELETE FROM ingest_docs WHERE manifest = ? AND doc_key = ?",
+                              (manifest, doc_key))
+
+    def _render(self, kind: str, rows, path: str):
+        data = to_invoice(rows) if kind == "invoice" else to_do(rows)
+        if self.profile:
+            from makk.profiling import profile_render
+            pdf, summary = profile_render(kind, data)
+            print(f"{os.path.basename(path)}: {summary['total_ms']} ms, profile in {summary['dir']}",
+                  flush=True)
+        else:
+            build = invoice_pdf.build_pdf if kind == "invoice" else do_pdf.build_pdf
+            pdf = build(data, deterministic=True).getvalue()
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(pdf)
+        os.replace(tmp, path)
+
+    def sync(self, path: str) -> dict:
+        # Bring one manifest's PDFs up to date; returns counts by outcome
+        manifest = os.path.abspath(path)
+        counts = {"rendered": 0, "reused": 0, "retired": 0, "failed": 0}
+        rows = read_rows(path)
+        kind = manifest_kind(rows)
+        if kind is None:
+            raise ValueError("no invoice_no, our_ref, mawb_no or hawb_no column; skipped")
+        stored = self._stored(manifest)
+        docs = group_rows(kind, rows)
+        out = os.path.join(self.out_dir, os.path.basename(manifest))
+        os.makedirs(out, exist_ok=True)
+
+        for key, doc_rows in docs.items():
+            h = hashlib.md5(f"{kind}:{self.layout}".encode(), usedforsecurity=False)
+            for row in doc_rows:
+                h.update(row_hash(row))
+            doc_hash = h.hexdigest()
+            prev = stored.pop(key, None)
+            if prev and prev["doc_hash"] == doc_hash and os.path.exists(prev["path"]):
+                counts["reused"] += 1
+                continue
+            pdf_path = os.path.join(out, f"{file_name(key)}.pdf")
+            try:
+                self._render(kind, doc_rows, pdf_path)
+            except (ValueError, KeyError) as e:
+                print(f"{os.path.basename(path)}: {key}: {e}", flush=True)
+                counts["failed"] += 1
+                if prev:
+                    stored[key] = prev   # the old PDF no longer matches its rows
+                continue
+            with self.conn:
+                self.conn.execute(
+                    "INSERT INTO ingest_docs VALUES (?, ?, ?, ?, ?) ON CONFLICT (manifest, doc_key)"
+                    " DO UPDATE SET doc_hash = excluded.doc_hash, path = excluded.path,"
+                    " rendered_at = excluded.rendered_at",
+                    (manifest, key, doc_hash, pdf_path, time.time()),
+                )
+            counts["rendered"] += 1
+
+        for key, prev in stored.items():
+            self._retire(manifest, key, prev["path"])
+            counts["retired"] += 1
+        if counts["rendered"] or counts["retired"]:
+            fsync_dir(out)
+        return counts
+
+    def retire_manifest(self, manifest: str) -> int:
+        stored = self._stored(manifest)
+        for key, prev in stored.items():
+            self._retire(manifest, key, prev["path"])
+        return len(stored)
+
+    def poll(self) -> list:
+        # One scan. A changed manifest is processed once its size and mtime
+        # have held for a whole poll interval, so a file still being saved
+        # is not read half-written. Returns (manifest, counts) pairs.
+        current = {}
+        for entry in os.scandir(self.watch_dir):
+            if entry.is_file() and entry.name.lower().endswith(MANIFEST_EXTS) \
+                    and not entry.name.startswith(("~$", ".")):
+                st = entry.stat()
+                current[os.path.abspath(entry.path)] = (st.st_mtime_ns, st.st_size)
+        results = []
+        for path, sig in current.items():
+            if self._seen.get(path) != sig and self._last.get(path) == sig:
+                try:
+                    results.append((os.path.basename(path), self.sync(path)))
+                except (OSError, ValueError, ImportError) as e:
+                    print(f"{os.path.basename(path)}: {e}", flush=True)
+                self._seen[path] = sig
+        for (manifest,) in self.conn.execute(
+                "SELECT DISTINCT manifest FROM ingest_docs").fetchall():
+            # Other watch folders may share the database
+            if os.path.dirname(manifest) == self.watch_dir and manifest not in current:
+                results.append((os.path.basename(manifest),
+                                {"retired": self.retire_manifest(manifest)}))
+        for path in set(self._seen) - set(current):
+            del self._seen[path]
+        self._last = current
+        return results
+
+    def run(self, interval: float = INGEST_POLL_S, once: bool = False):
+        while True:
+            for manifest, counts in self.poll():
+                print(f"{manifest}: " + ", ".join(f"{v} {k}" for k, v in counts.items() if v),
+                      flush=True)
+            if once and not any(self._seen.get(p) != s for p, s in self._last.items()):
+                return
+            time.sleep(interval)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Render PDFs from manifests in a watched folder")
+    ap.add_argument("watch_dir")
+    ap.add_argument("--out", help="output directory (default: WATCH_DIR/rendered)")
+    ap.add_argument("--interval", type=float, default=INGEST_POLL_S, help="seconds between scans")
+    ap.add_argument("--once", action="store_true", help="process current manifests and exit")
+    ap.add_argument("--db", help="database path (default: data/makk.db)")
+    ap.add_argument("--profile", action="store_true",
+                    help="profile each render and save it under data/profiles/")
+    args = ap.parse_args(argv)
+
+    Ingestor(args.watch_dir, args.out, args.db, args.profile).run(args.interval, args.once)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+# ----------------------------
+# Invoice PDF
+# ----------------------------
+# `inv` holds the invoice page's values: inv_date (a date), invoice_no,
+# customer_id, receiver, phone, address, items (row dicts keyed like the
+# line-items editor), subtotal, sales_tax, total and auto_fit.
+import io
+
+from reportlab.lib.pagesizes import LETTER
+from reportlab.lib.units import inch
+from reportlab.lib import colors
+from reportlab.platypus import Table, TableStyle
+from reportlab.lib.utils import ImageReader
+
+from makk.assets import logo_bytes, logo_size
+from makk.config import COMPANY_ADDR, COMPANY_NAME, COMPANY_PHONE, PAYABLE_NOTE, PAYMENT_INFO, THANK_YOU
+from makk.helpers import money, safe_float, safe_str
+from makk.reproducible import new_canvas
+from makk.textfit import fit_text
+
+
+def build_pdf(inv: dict, deterministic: bool = False) -> io.BytesIO:
+    buf = io.BytesIO()
+    c = new_canvas(buf, LETTER, inv, inv["inv_date"], deterministic)
+    w, h = LETTER
+
+    margin_x = 0.65 * inch
+    margin_r = w - 0.65 * inch
+    top_y = h - 0.55 * inch
+
+    # ── Logo ──
+    image_bytes = logo_bytes()
+    if image_bytes:
+        try:
+            img_w, img_h = logo_size()
+            aspect = img_h / img_w
+            logo_display_w = 1.3 * inch
+            logo_display_h = logo_display_w * aspect
+            logo_buf = io.BytesIO(image_bytes)
+            c.drawImage(ImageReader(logo_buf), margin_x, top_y - logo_display_h,
+                        width=logo_display_w, height=logo_display_h, mask="auto")
+        except Exception:
+            pass
+
+    # ── INVOICE title ──
+    c.setFont("Helvetica", 36)
+    c.setFillColor(colors.HexColor("#4A6FA5"))
+    c.drawCentredString(w / 2, top_y - 0.5 * inch, "INVOICE")
+    c.setFillColor(colors.black)
+
+    # ── Horizontal rule ──
+    rule_y = top_y - 0.75 * inch
+    c.setStrokeColor(colors.HexColor("#4A6FA5"))
+    c.setLineWidth(1.5)
+    c.line(margin_x, rule_y, margin_r, rule_y)
+    c.setLineWidth(1)
+    c.setStrokeColor(colors.black)
+
+    # ── Meta block ──
+    meta_y = rule_y - 0.28 * inch
+
+    c.setFont("Helvetica-Bold", 9)
+    c.setFillColor(colors.HexColor("#4A6FA5"))
+    c.drawString(margin_x, meta_y, "DATE:")
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica", 9)
+    c.drawString(margin_x, meta_y - 0.17 * inch, inv["inv_date"].strftime("%m/%d/%y"))
+
+    c.setFont("Helvetica-Bold", 9)
+    c.setFillColor(colors.HexColor("#4A6FA5"))
+    c.drawString(margin_x, meta_y - 0.38 * inch, "INVOICE #")
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica", 9)
+    c.drawString(margin_x, meta_y - 0.55 * inch, safe_str(inv["invoice_no"]))
+
+    c.setFont("Helvetica-Bold", 9)
+    c.setFillColor(colors.HexColor("#4A6FA5"))
+    c.drawString(margin_x, meta_y - 0.76 * inch, "CUSTOMER ID:")
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica", 9)
+    c.drawString(margin_x, meta_y - 0.93 * inch, safe_str(inv["customer_id"]))
+
+    # ── TO block ──
+    to_x = w / 2 + 0.5 * inch
+    c.setFont("Helvetica-Bold", 9)
+    c.setFillColor(colors.HexColor("#4A6FA5"))
+    c.drawString(to_x, meta_y, "TO:")
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica", 9)
+    to_y = meta_y - 0.17 * inch
+    table_top = meta_y - 1.15 * inch
+    if inv["auto_fit"]:
+        # Receiver, phone and address share the space above the table
+        to_text = "\n".join([inv["receiver"].strip(), inv["phone"].strip(), inv["address"]])
+        fs, lines = fit_text(to_text, "Helvetica", margin_r - to_x,
+                             to_y - (table_top + 0.1 * inch),
+                             9, 6, 0.17 * inch / 9)
+        c.setFont("Helvetica", fs)
+        for line in lines:
+            c.drawRightString(margin_r, to_y, line)
+            to_y -= 0.17 * inch * fs / 9
+    elif inv["receiver"].strip():
+        words = inv["receiver"].strip().split()
+        line = ""
+        for word in words:
+            test = (line + " " + word).strip()
+            if c.stringWidth(test, "Helvetica", 9) > (margin_r - to_x):
+                c.drawRightString(margin_r, to_y, line)
+                to_y -= 0.17 * inch
+                line = word
+            else:
+                line = test
+        if line:
+            c.drawRightString(margin_r, to_y, line)
+            to_y -= 0.17 * inch
+    if not inv["auto_fit"] and inv["phone"].strip():
+        c.drawRightString(margin_r, to_y, inv["phone"]); to_y -= 0.17 * inch
+    if not inv["auto_fit"] and inv["address"].strip():
+        for addr_line in inv["address"].split("\n"):
+            if addr_line.strip():
+                c.drawRightString(margin_r, to_y, addr_line.strip())
+                to_y -= 0.17 * inch
+
+    # ── Line items table ──
+    table_w = margin_r - margin_x
+    col_widths = [table_w * 0.07, table_w * 0.53, table_w * 0.20, table_w * 0.20]
+
+    data = [["QTY", "DESCRIPTION", "WEIGHT", "LINE\nTOTAL(USD)"]]
+    for r in inv["items"]:
+        qty_val = safe_float(r["Qty"])
+        qty = str(int(qty_val)) if qty_val > 0 else ""
+        desc = safe_str(r["Description"]).strip()
+        wt = safe_str(r["Weight"]).strip()
+        unit = safe_str(r["Unit"]).strip()
+        wt_display = "NA" if unit == "NA" else (f"{wt} {unit}".strip() if wt else "")
+        amt = safe_float(r["Line Total (USD)"])
+        amt_str = money(amt) if amt > 0 else ""
+        data.append([qty, desc, wt_display, amt_str])
+
+    data.append(["", "", "Subtotal", money(inv["subtotal"])])
+    data.append(["", "", "Sales Tax", money(float(inv["sales_tax"]))])
+    data.append(["", "", "Total", money(inv["total"])])
+
+    n_items = len(inv["items"])
+    n_rows = len(data)
+
+    tbl = Table(data, colWidths=col_widths, repeatRows=1)
+    tbl.setStyle(TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#F2F2F2")),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("FONTSIZE", (0, 0), (-1, 0), 8),
+        ("ALIGN", (0, 0), (-1, 0), "CENTER"),
+        ("VALIGN", (0, 0), (-1, 0), "MIDDLE"),
+        ("TOPPADDING", (0, 0), (-1, 0), 6),
+        ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
+        ("GRID", (0, 0), (-1, n_items), 0.5, colors.HexColor("#CCCCCC")),
+        ("FONTNAME", (0, 1), (-1, n_items), "Helvetica"),
+        ("FONTSIZE", (0, 1), (-1, n_items), 9),
+        ("ALIGN", (0, 1), (0, n_items), "CENTER"),
+        ("ALIGN", (2, 1), (2, n_items), "CENTER"),
+        ("ALIGN", (3, 1), (3, n_items), "RIGHT"),
+        ("VALIGN", (0, 1), (-1, n_items), "MIDDLE"),
+        ("TOPPADDING", (0, 1), (-1, n_items), 5),
+        ("BOTTOMPADDING", (0, 1), (-1, n_items), 5),
+        ("FONTNAME", (0, n_items + 1), (-1, n_items + 2), "Helvetica"),
+        ("FONTSIZE", (0, n_items + 1), (-1, n_rows - 1), 9),
+        ("ALIGN", (2, n_items + 1), (3, n_rows - 1), "RIGHT"),
+        ("TOPPADDING", (0, n_items + 1), (-1, n_rows - 1), 4),
+        ("BOTTOMPADDING", (0, n_items + 1), (-1, n_rows - 1), 4),
+        ("LINEABOVE", (2, n_items + 1), (3, n_items + 1), 0.5, colors.HexColor("#CCCCCC")),
+        ("FONTNAME", (2, n_rows - 1), (3, n_rows - 1), "Helvetica-Bold"),
+        ("FONTSIZE", (2, n_rows - 1), (3, n_rows - 1), 10),
+        ("LINEABOVE", (2, n_rows - 1), (3, n_rows - 1), 0.5, colors.HexColor("#CCCCCC")),
+        ("LINEBELOW", (2, n_rows - 1), (3, n_rows - 1), 0.5, colors.HexColor("#CCCCCC")),
+    ]))
+
+    _, table_h = tbl.wrapOn(c, table_w, h)
+    tbl.drawOn(c, margin_x, table_top - table_h)
+
+    # ── Footer note (checks payable + thank you) ──
+    footer_y = table_top - table_h - 0.4 * inch
+    c.setFont("Helvetica-Bold", 8)
+    c.setFillColor(colors.HexColor("#4A6FA5"))
+    c.drawCentredString(w / 2, footer_y, PAYABLE_NOTE)
+    c.setFont("Helvetica", 8)
+    c.setFillColor(colors.black)
+    c.drawCentredString(w / 2, footer_y - 0.18 * inch, THANK_YOU)
+
+    # ── Payment Information block (in the blank space) ──
+    pay_y = footer_y - 0.55 * inch
+
+    # Section title
+    c.setFont("Helvetica-Bold", 11)
+    c.setFillColor(colors.HexColor("#4A6FA5"))
+    c.drawString(margin_x, pay_y, "PAYMENT INFORMATION")
+    pay_y -= 0.08 * inch
+
+    # Teal underline
+    c.setStrokeColor(colors.HexColor("#2E8B8B"))
+    c.setLineWidth(1)
+    c.line(margin_x, pay_y, margin_r, pay_y)
+    pay_y -= 0.25 * inch
+    c.setStrokeColor(colors.black)
+
+    # Payment rows
+    for label, value in PAYMENT_INFO:
+        c.setFont("Helvetica-Bold", 8.5)
+        c.setFillColor(colors.HexColor("#2C3E6B"))
+        label_str = f"{label}: "
+        label_w = c.stringWidth(label_str, "Helvetica-Bold", 8.5)
+        c.drawString(margin_x, pay_y, label_str)
+        c.setFont("Helvetica", 8.5)
+        c.drawString(margin_x + label_w, pay_y, value)
+        pay_y -= 0.23 * inch
+
+    # ── Bottom company block ──
+    bottom_y = 0.55 * inch
+    c.setStrokeColor(colors.HexColor("#4A6FA5"))
+    c.setLineWidth(1)
+    c.line(margin_x, bottom_y + 0.32 * inch, margin_r, bottom_y + 0.32 * inch)
+    c.setFont("Helvetica-Bold", 8)
+    c.setFillColor(colors.HexColor("#4A6FA5"))
+    c.drawCentredString(w / 2, bottom_y + 0.15 * inch, COMPANY_NAME)
+    c.setFont("Helvetica", 8)
+    c.setFillColor(colors.black)
+    c.drawCentredString(w / 2, bottom_y, f"{COMPANY_ADDR}  |  {COMPANY_PHONE}")
+
+    c.showPage()
+    c.save()
+    buf.seek(0)
+    return buf
@@ -0,0 +1,285 @@
+# ----------------------------
+# Append-only draft journal
+# ----------------------------
+# Every draft on either page is one file, DATA_DIR/journal/<kind>-<id>.jsonl.
+# Each edit appends a few small records (one per changed field, line-item
+# cell or row count), so autosave costs the same for a 2-line invoice and
+# a 200-line one. A writer thread collects appends for JOURNAL_FLUSH_S and
+# writes and fsyncs each touched file once per batch; a log that grows past
+# JOURNAL_COMPACT_RECORDS records is rewritten as a single snapshot.
+# Replaying a file rebuilds the draft's fields and line items. A batch
+# that cannot be written (disk full, permissions) stays pending and is
+# retried on the next flush; the error is kept in Journal.error so the
+# pages can warn that autosave is failing.
+#
+# Records (all values are absolute, so replaying one twice is harmless):
+#   {"snap": {"fields": {...}, "rows": [[...], ...] | null}}
+#   {"f": name, "v": value}            field
+#   {"r": index, "c": column, "v": v}  line-item cell
+#   {"n": count}                       number of line items
+import atexit
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import date
+from functools import lru_cache
+
+from makk import lineitems
+from makk.config import DATA_DIR, DRAFT_TTL_S, JOURNAL_COMPACT_RECORDS, JOURNAL_FLUSH_S
+from makk.helpers import fsync_dir
+
+_DRAFT_ID = re.compile(r"[0-9a-f]{32}")
+
+
+def _default(o):
+    if isinstance(o, date):
+        return {"$date": o.isoformat()}
+    raise TypeError(f"{type(o).__name__} is not JSON serializable")
+
+
+def _hook(d):
+    if len(d) == 1 and "$date" in d:
+        return date.fromisoformat(d["$date"])
+    return d
+
+
+def encode(record: dict) -> bytes:
+    return (json.dumps(record, default=_default, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def valid_id(draft_id) -> bool:
+    return isinstance(draft_id, str) and _DRAFT_ID.fullmatch(draft_id) is not None
+
+
+def field(name: str, value) -> dict:
+    return {"f": name, "v": value}
+
+
+def cell(index: int, column: str, value) -> dict:
+    return {"r": index, "c": column, "v": value}
+
+
+def count(n: int) -> dict:
+    return {"n": n}
+
+
+def snapshot(fields: dict, items=None) -> dict:
+    return {"snap": {"fields": dict(fields),
+                     "rows": None if items is None else lineitems.dump(items)}}
+
+
+def changed_fields(state: dict, fields: dict) -> list:
+    # Field records for values that differ from state; state is updated
+    records = [field(k, v) for k, v in fields.items() if k not in state or state[k] != v]
+    state.update(fields)
+    return records
+
+
+class Draft:
+    __slots__ = ("fields", "items")
+
+    def __init__(self):
+        self.fields = {}
+        self.items = None   # list of LineItem once a page has recorded rows
+
+    def apply(self, rec: dict):
+        if "f" in rec:
+            self.fields[rec["f"]] = rec["v"]
+        elif "r" in rec:
+            if self.items is not None and rec["r"] < len(self.items):
+                self.items[rec["r"]].set(rec["c"], rec["v"])
+        elif "n" in rec:
+            items = self.items if self.items is not None else []
+            del items[rec["n"]:]
+            items.extend(lineitems.LineItem() for _ in range(rec["n"] - len(items)))
+            self.items = items
+        elif "snap" in rec:
+            snap = rec["snap"]
+            self.fields = dict(snap["fields"])
+            self.items = None if snap["rows"] is None else lineitems.load(snap["rows"])
+
+
+def replay_file(path: str):
+    draft, n = Draft(), 0
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                rec = json.loads(line, object_hook=_hook)
+            except ValueError:
+                continue   # torn write from a crash
+            draft.apply(rec)
+            n += 1
+    return draft, n
+
+
+# ----------------------------
+# Journal
+# ----------------------------
+class Journal:
+    def __init__(self, root: str, flush_s: float = JOURNAL_FLUSH_S,
+                 compact_records: int = JOURNAL_COMPACT_RECORDS):
+        self.root = root
+        self.flush_s = flush_s
+        self.compact_records = compact_records
+        self._cond = threading.Condition()   # guards _pending and _known
+        self._io = threading.Lock()          # file writes, compaction and reads
+        self._pending = {}                   # (kind, id) -> [encoded lines]
+        self._known = set()                  # drafts with a file or pending lines
+        self._records = {}                   # (kind, id) -> records in the file
+        self._checked = set()                # files whose tail ends in a newline
+        self._writer = None
+        self.error = None                    # last write failure, None once writes succeed
+        self.fsyncs = 0
+        self.compactions = 0
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key) -> str:
+        return os.path.join(self.root, f"{key[0]}-{key[1]}.jsonl")
+
+    def append(self, kind: str, draft_id: str, records: list, initial=None):
+        # initial() -> snapshot record, written instead of the records when
+        # the draft has no journal yet, so the first save captures the
+        # whole form (defaults included) rather than just the edit
+        if not records:
+            return
+        key = (kind, draft_id)
+        with self._cond:
+            if key not in self._known and not os.path.exists(self._path(key)) \
+                    and initial is not None:
+                records = [initial()]
+            self._known.add(key)
+            self._pending.setdefault(key, []).extend(encode(r) for r in records)
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._run, name="draft-journal",
+                                                daemon=True)
+                self._writer.start()
+            self._cond.notify()
+
+    def replay(self, kind: str, draft_id: str):
+        # Draft, or None when there is no journal for it
+        if not valid_id(draft_id):
+            return None
+        key = (kind, draft_id)
+        with self._io:
+            self._flush()
+            try:
+                draft, n = replay_file(self._path(key))
+            except OSError:
+                return None
+            self._records[key] = n
+        with self._cond:
+            self._known.add(key)
+        return draft
+
+    def recent(self, kind: str, limit: int = 20) -> list:
+        now, rows = time.time(), []
+        for name in os.listdir(self.root):
+            if name.startswith(kind + "-") and name.endswith(".jsonl"):
+                mtime = os.path.getmtime(os.path.join(self.root, name))
+                if now - mtime <= DRAFT_TTL_S:
+                    rows.append({"draft": name[len(kind) + 1:-6], "modified": mtime})
+        rows.sort(key=lambda r: -r["modified"])
+        return rows[:limit]
+
+    def purge(self, ttl_s: float = DRAFT_TTL_S) -> int:
+        now, n = time.time(), 0
+        with self._io:
+            for name in os.listdir(self.root):
+                path = os.path.join(self.root, name)
+                if name.endswith(".jsonl") and now - os.path.getmtime(path) > ttl_s:
+                    os.remove(path)
+                    n += 1
+        return n
+
+    def flush(self):
+        with self._io:
+            self._flush()
+
+    # ── Writer (caller holds _io) ──
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+            # let a burst of edits share one fsync; back off while writes fail
+            time.sleep(max(self.flush_s, 1.0) if self.error else self.flush_s)
+            self.flush()
+
+    def _flush(self):
+        with self._cond:
+            pending, self._pending = self._pending, {}
+        created, failed, written = False, {}, []
+        for key, lines in pending.items():
+            path = self._path(key)
+            new, prefix = False, b""
+            try:
+                if key not in self._checked:
+                    new = not os.path.exists(path)
+                    if not new and os.path.getsize(path):
+                        with open(path, "rb") as f:
+                            f.seek(-1, os.SEEK_END)
+                            if f.read(1) != b"\n":
+                                prefix = b"\n"
+                with open(path, "ab") as f:
+                    f.write(prefix + b"".join(lines))
+                    f.flush()
+                    os.fsync(f.fileno())
+            except OSError as e:
+                # Retried on the next flush. Part of the batch may have
+                # reached the file; replaying a record twice is harmless,
+                # and the tail is checked again for a torn line.
+                self._checked.discard(key)
+                failed[key] = lines
+                self._fail(f"{os.path.basename(path)}: {e}")
+                continue
+            created |= new
+            self._checked.add(key)
+            self.fsyncs += 1
+            self._records[key] = self._records.get(key, 0) + len(lines)
+            written.append(key)
+        if failed:
+            with self._cond:
+                for key, lines in failed.items():
+                    self._pending[key] = lines + self._pending.get(key, [])
+        try:
+            if created:
+                fsync_dir(self.root)
+            for key in written:
+                if self._records[key] > self.compact_records:
+                    self._compact(key)
+        except OSError as e:
+            self._fail(f"compaction: {e}")   # the uncompacted log is still intact
+            return
+        if not failed:
+            self.error = None
+
+    def _fail(self, message: str):
+        if self.error is None:
+            print(f"draft journal: autosave failed, will retry: {message}",
+                  file=sys.stderr, flush=True)
+        self.error = message
+
+    def _compact(self, key):
+        path = self._path(key)
+        draft, _ = replay_file(path)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(encode(snapshot(draft.fields, draft.items)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        fsync_dir(self.root)
+        self._records[key] = 1
+        self.compactions += 1
+
+
+@lru_cache(maxsize=1)
+def get_journal() -> Journal:
+    # Shared by all sessions of the app process
+    journal = Journal(os.path.join(DATA_DIR, "journal"))
+    journal.purge()
+    atexit.register(journal.flush)
+    return journal
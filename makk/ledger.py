@@ -0,0 +1,325 @@
+# ----------------------------
+# Issued invoices and revenue aggregates
+# ----------------------------
+# Issuing, paying or voiding an invoice updates revenue_agg in the same
+# transaction, so totals by customer, month and status never need a scan
+# of the invoices. Amounts are kept in integer cents so the incremental
+# sums match a rebuild exactly. Every status change after issue (paid,
+# void) is also appended to status_changes, so the accounting export can
+# pick up changes to invoices it has already exported.
+#
+#   python -m makk.ledger check     # compare revenue_agg with a rebuild
+#   python -m makk.ledger rebuild   # recompute revenue_agg from invoices
+import argparse
+import sys
+import threading
+import time
+from datetime import date
+from functools import lru_cache
+
+from makk import db
+from makk.helpers import safe_float, safe_str
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS invoices (
+    id          INTEGER PRIMARY KEY,
+    invoice_no  TEXT NOT NULL UNIQUE,
+    customer_id TEXT NOT NULL,
+    receiver    TEXT NOT NULL,
+    phone       TEXT NOT NULL,
+    address     TEXT NOT NULL,
+    inv_date    TEXT NOT NULL,
+    period      TEXT NOT NULL,
+    subtotal    INTEGER NOT NULL,
+    sales_tax   INTEGER NOT NULL,
+    total       INTEGER NOT NULL,
+    status      TEXT NOT NULL,
+    issued_at   REAL NOT NULL,
+    updated_at  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS invoice_items (
+    invoice_id  INTEGER NOT NULL REFERENCES invoices(id),
+    line_no     INTEGER NOT NULL,
+    qty         REAL NOT NULL,
+    description TEXT NOT NULL,
+    weight      TEXT NOT NULL,
+    unit        TEXT NOT NULL,
+    line_total  INTEGER NOT NULL,
+    PRIMARY KEY (invoice_id, line_no)
+);
+CREATE TABLE IF NOT EXISTS revenue_agg (
+    customer_id TEXT NOT NULL,
+    period      TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    n_invoices  INTEGER NOT NULL,
+    subtotal    INTEGER NOT NULL,
+    sales_tax   INTEGER NOT NULL,
+    total       INTEGER NOT NULL,
+    PRIMARY KEY (customer_id, period, status)
+);
+CREATE TABLE IF NOT EXISTS status_changes (
+    seq         INTEGER PRIMARY KEY,
+    invoice_id  INTEGER NOT NULL REFERENCES invoices(id),
+    status      TEXT NOT NULL,
+    changed_at  REAL NOT NULL
+);
+"""
+
+ISSUED, PAID, VOID = "issued", "paid", "void"
+STATUSES = (ISSUED, PAID, VOID)
+
+
+class LedgerError(ValueError):
+    pass
+
+
+def cents(x) -> int:
+    return int(round(safe_float(x) * 100))
+
+
+def dollars(c: int) -> float:
+    return c / 100
+
+
+# ----------------------------
+# Ledger
+# ----------------------------
+class Ledger:
+    def __init__(self, db_path: str = None):
+        self.conn = db.connect(SCHEMA, db_path)
+        self._lock = threading.RLock()   # one connection shared by session threads
+
+    def _bump(self, customer_id, period, status, sign, subtotal, sales_tax, total):
+        self.conn.execute(
+            "INSERT INTO revenue_agg VALUES (?, ?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT (customer_id, period, status) DO UPDATE SET"
+            " n_invoices = n_invoices + excluded.n_invoices,"
+            " subtotal = subtotal + excluded.subtotal,"
+            " sales_tax = sales_tax + excluded.sales_tax,"
+            " total = total + excluded.total",
+            (customer_id, period, status, sign, sign * subtotal, sign * sales_tax, sign * total),
+        )
+        self.conn.execute(
+            "DELETE FROM revenue_agg WHERE customer_id = ? AND period = ? AND status = ?"
+            " AND n_invoices = 0",
+            (customer_id, period, status),
+        )
+
+    def issue(self, inv: dict) -> int:
+        # inv is the same dict the invoice page passes to build_pdf()
+        invoice_no = safe_str(inv["invoice_no"]).strip()
+        if not invoice_no:
+            raise LedgerError("An invoice number is required to issue an invoice.")
+        inv_date = inv["inv_date"]
+        if isinstance(inv_date, str):
+            inv_date = date.fromisoformat(inv_date)
+        period = inv_date.strftime("%Y-%m")
+        customer_id = safe_str(inv["customer_id"]).strip()
+        items = inv["items"]
+        sub = sum(cents(r["Line Total (USD)"]) for r in items)
+        tax = cents(inv["sales_tax"])
+        now = time.time()
+        with self._lock, self.conn:
+            if self.conn.execute("SELECT 1 FROM invoices WHERE invoice_no = ?",
+                                 (invoice_no,)).fetchone():
+                raise LedgerError(f"Invoice {invoice_no} has already been issued.")
+            invoice_id = self.conn.execute(
+                "INSERT INTO invoices (invoice_no, customer_id, receiver, phone, address,"
+                " inv_date, period, subtotal, sales_tax, total, status, issued_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (invoice_no, customer_id, safe_str(inv["receiver"]), safe_str(inv["phone"]),
+                 safe_str(inv["address"]), inv_date.isoformat(), period,
+                 sub, tax, sub + tax, ISSUED, now, now),
+            ).lastrowid
+            self.conn.executemany(
+                "INSERT INTO invoice_items VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(invoice_id, i, safe_float(r["Qty"]), safe_str(r["Description"]),
+                  safe_str(r["Weight"]), safe_str(r["Unit"]), cents(r["Line Total (USD)"]))
+                 for i, r in enumerate(items)],
+            )
+            self._bump(customer_id, period, ISSUED, 1, sub, tax, sub + tax)
+        return invoice_id
+
+    def set_status(self, invoice_no: str, status: str):
+        # issued -> paid, and issued/paid -> void
+        if status not in (PAID, VOID):
+            raise LedgerError(f"Unknown status {status!r}.")
+        with self._lock, self.conn:
+            row = self.conn.execute(
+                "SELECT id, customer_id, period, status, subtotal, sales_tax, total"
+                " FROM invoices WHERE invoice_no = ?", (safe_str(invoice_no).strip(),),
+            ).fetchone()
+            if row is None:
+                raise LedgerError(f"No issued invoice {invoice_no}.")
+            old = row["status"]
+            if old == status:
+                return
+            if old == VOID or (old == PAID and status != VOID):
+                raise LedgerError(f"Invoice {invoice_no} is {old}; cannot mark it {status}.")
+            now = time.time()
+            self.conn.execute("UPDATE invoices SET status = ?, updated_at = ? WHERE id = ?",
+                              (status, now, row["id"]))
+            self.conn.execute("INSERT INTO status_changes (invoice_id, status, changed_at)"
+                              " VALUES (?, ?, ?)", (row["id"], status, now))
+            amounts = (row["subtotal"], row["sales_tax"], row["total"])
+            self._bump(row["customer_id"], row["period"], old, -1, *amounts)
+            self._bump(row["customer_id"], row["period"], status, 1, *amounts)
+
+    def void(self, invoice_no: str):
+        self.set_status(invoice_no, VOID)
+
+    def mark_paid(self, invoice_no: str):
+        self.set_status(invoice_no, PAID)
+
+    # ── Reporting ──
+    def totals(self, group_by=("customer_id", "period", "status"),
+               customer_id=None, period_from=None, period_to=None, statuses=None) -> list:
+        # statuses=None means every status; an empty list matches nothing
+        if statuses is not None and not statuses:
+            return []
+        cols = [c for c in group_by if c in ("customer_id", "period", "status")]
+        where, args = [], []
+        if customer_id:
+            where.append("customer_id = ?")
+            args.append(customer_id)
+        if period_from:
+            where.append("period >= ?")
+            args.append(period_from)
+        if period_to:
+            where.append("period <= ?")
+            args.append(period_to)
+        if statuses is not None:
+            where.append(f"status IN ({', '.join('?' * len(statuses))})")
+            args.extend(statuses)
+        sql = ("SELECT " + "".join(f"{c}, " for c in cols) +
+               "SUM(n_invoices) AS n_invoices, SUM(subtotal) AS subtotal,"
+               " SUM(sales_tax) AS sales_tax, SUM(total) AS total FROM revenue_agg")
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if cols:
+            sql += " GROUP BY " + ", ".join(cols) + " ORDER BY " + ", ".join(cols)
+        with self._lock:
+            rows = self.conn.execute(sql, args).fetchall()
+        return [dict(r) for r in rows if r["n_invoices"]]
+
+    def customers(self) -> list:
+        with self._lock:
+            return [r[0] for r in self.conn.execute(
+                "SELECT DISTINCT customer_id FROM revenue_agg ORDER BY customer_id")]
+
+    def periods(self) -> list:
+        with self._lock:
+            return [r[0] for r in self.conn.execute(
+                "SELECT DISTINCT period FROM revenue_agg ORDER BY period")]
+
+    # ── Export ──
+    def last_id(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM invoices").fetchone()[0]
+
+    def issued_between(self, after_id: int, upto_id: int, limit: int) -> list:
+        # (id, inv) pairs in id order, after_id < id <= upto_id. inv has the
+        # keys build_pdf() takes, except the auto_fit rendering option, plus
+        # the invoice's current status.
+        with self._lock:
+            heads = self.conn.execute(
+                "SELECT id, invoice_no, customer_id, receiver, phone, address, inv_date,"
+                " subtotal, sales_tax, total, status FROM invoices"
+                " WHERE id > ? AND id <= ? ORDER BY id LIMIT ?",
+                (after_id, upto_id, limit),
+            ).fetchall()
+            if not heads:
+                return []
+            items = self.conn.execute(
+                "SELECT invoice_id, qty, description, weight, unit, line_total FROM invoice_items"
+                " WHERE invoice_id BETWEEN ? AND ? ORDER BY invoice_id, line_no",
+                (heads[0]["id"], heads[-1]["id"]),
+            ).fetchall()
+        by_invoice = {}
+        for r in items:
+            qty = r["qty"]
+            by_invoice.setdefault(r["invoice_id"], []).append({
+                "Qty": int(qty) if qty == int(qty) else qty,
+                "Description": r["description"],
+                "Weight": r["weight"],
+                "Unit": r["unit"],
+                "Line Total (USD)": dollars(r["line_total"]),
+            })
+        return [(h["id"], {
+            "inv_date": date.fromisoformat(h["inv_date"]),
+            "invoice_no": h["invoice_no"],
+            "customer_id": h["customer_id"],
+            "receiver": h["receiver"],
+            "phone": h["phone"],
+            "address": h["address"],
+            "items": by_invoice.get(h["id"], []),
+            "subtotal": dollars(h["subtotal"]),
+            "sales_tax": dollars(h["sales_tax"]),
+            "total": dollars(h["total"]),
+            "status": h["status"],
+        }) for h in heads]
+
+    def last_change_seq(self) -> int:
+        with self._lock:
+            return self.conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM status_changes").fetchone()[0]
+
+    def changes_between(self, after_seq: int, upto_seq: int) -> list:
+        # Status changes in seq order, after_seq < seq <= upto_seq
+        with self._lock:
+            return [dict(r) for r in self.conn.execute(
+                "SELECT c.seq, i.invoice_no, c.status, c.changed_at FROM status_changes c"
+                " JOIN invoices i ON i.id = c.invoice_id"
+                " WHERE c.seq > ? AND c.seq <= ? ORDER BY c.seq",
+                (after_seq, upto_seq),
+            )]
+
+    # ── Full rebuild ──
+    _REBUILD = (
+        "SELECT customer_id, period, status, COUNT(*), SUM(subtotal), SUM(sales_tax), SUM(total)"
+        " FROM invoices GROUP BY customer_id, period, status"
+    )
+
+    def check(self) -> list:
+        # Rows where revenue_agg differs from a from-scratch rebuild
+        with self._lock:
+            fresh = {tuple(r[:3]): tuple(r[3:]) for r in self.conn.execute(self._REBUILD)}
+            stored = {tuple(r[:3]): tuple(r[3:]) for r in self.conn.execute(
+                "SELECT customer_id, period, status, n_invoices, subtotal, sales_tax, total"
+                " FROM revenue_agg")}
+        return [(k, stored.get(k), fresh.get(k))
+                for k in sorted(set(fresh) | set(stored)) if fresh.get(k) != stored.get(k)]
+
+    def rebuild(self):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM revenue_agg")
+            self.conn.execute("INSERT INTO revenue_agg " + self._REBUILD)
+
+
+@lru_cache(maxsize=1)
+def get_ledger() -> Ledger:
+    # Shared by all sessions of the app process
+    return Ledger()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Revenue aggregate maintenance")
+    ap.add_argument("command", choices=["check", "rebuild"])
+    ap.add_argument("--db", help="database path (default: data/makk.db)")
+    args = ap.parse_args(argv)
+
+    ledger = Ledger(args.db)
+    diffs = ledger.check()
+    for key, stored, fresh in diffs:
+        print(f"mismatch {key}: incremental={stored} rebuild={fresh}")
+    if args.command == "rebuild":
+        ledger.rebuild()
+        print(f"rebuilt revenue_agg ({len(diffs)} group(s) differed)")
+    else:
+        print("revenue_agg matches a full rebuild" if not diffs
+              else f"{len(diffs)} group(s) differ")
+        sys.exit(1 if diffs else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# ----------------------------
+# Compact invoice line items
+# ----------------------------
+# One slotted record per row instead of a pandas DataFrame per session.
+# Rows are only expanded to dicts (keyed like the line-items editor) for
+# the widget and the PDF builder, and are not kept around.
+import sys
+
+from makk.helpers import safe_float, safe_str
+
+INVOICE_FIELDS = ("inv_date", "invoice_no", "customer_id", "receiver", "phone",
+                  "address", "auto_fit")
+COLUMNS = ("Qty", "Description", "Weight", "Unit", "Line Total (USD)")
+FIELDS = ("qty", "description", "weight", "unit", "line_total")
+_FIELD_FOR = dict(zip(COLUMNS, FIELDS))
+# Keep cell types stable so the editor's schema (and widget identity)
+# does not change when a value is edited
+_COERCE = {
+    "qty": lambda v: int(safe_float(v)),
+    "description": safe_str,
+    "weight": safe_str,
+    "unit": safe_str,
+    "line_total": safe_float,
+}
+
+
+class LineItem:
+    __slots__ = FIELDS
+
+    def __init__(self, qty=1, description="", weight="", unit="LB", line_total=0.0):
+        self.qty = qty
+        self.description = description
+        self.weight = weight
+        self.unit = unit
+        self.line_total = line_total
+
+    def row(self) -> dict:
+        return {col: getattr(self, f) for col, f in zip(COLUMNS, FIELDS)}
+
+    def set(self, column: str, value):
+        field = _FIELD_FOR[column]
+        setattr(self, field, _COERCE[field](value))
+
+    def nbytes(self) -> int:
+        return sys.getsizeof(self) + sum(sys.getsizeof(getattr(self, f)) for f in FIELDS)
+
+
+def to_rows(items) -> list:
+    return [it.row() for it in items]
+
+
+def apply_edits(items, edited_rows: dict) -> list:
+    # Fold the data editor's edited_rows into the records; edits are
+    # absolute cell values, so applying them again is harmless. Returns
+    # the (row, column, value) cells that actually changed.
+    changed = []
+    for idx, changes in edited_rows.items():
+        idx = int(idx)
+        if idx < len(items):
+            for col, val in changes.items():
+                if col in _FIELD_FOR:
+                    it = items[idx]
+                    old = getattr(it, _FIELD_FOR[col])
+                    it.set(col, val)
+                    new = getattr(it, _FIELD_FOR[col])
+                    if new != old:
+                        changed.append((idx, col, new))
+    return changed
+
+
+def invoice_data(fields, rows) -> dict:
+    # The dict build_pdf() and the ledger take, from the invoice page's
+    # field values (st.session_state works) and the line-item rows
+    items = [
+        {
+            "Qty": r["Qty"],
+            "Description": safe_str(r["Description"]),
+            "Weight": safe_str(r["Weight"]),
+            "Unit": safe_str(r["Unit"]),
+            "Line Total (USD)": safe_float(r["Line Total (USD)"]),
+        }
+        for r in rows
+    ]
+    subtotal = float(sum(r["Line Total (USD)"] for r in items))
+    sales_tax = float(fields["sales_tax"])
+    return {
+        **{k: fields[k] for k in INVOICE_FIELDS},
+        "items": items,
+        "subtotal": subtotal,
+        "sales_tax": sales_tax,
+        "total": round(subtotal + sales_tax, 2),
+    }
+
+
+def nbytes(items) -> int:
+    return sys.getsizeof(items) + sum(it.nbytes() for it in items)
+
+
+def dump(items) -> list:
+    return [[getattr(it, f) for f in FIELDS] for it in items]
+
+
+def load(rows) -> list:
+    return [LineItem(*row) for row in rows]
@@ -0,0 +1,383 @@
+# ----------------------------
+# Outbound document mailer
+# ----------------------------
+# Rendered PDFs are queued in SQLite, one outbox row per recipient, and
+# sent through a small pool of persistent SMTP connections. A dispatch
+# pass claims due rows, splits them into batches, and each batch is sent
+# over one pooled connection without reconnecting. Failures are retried
+# with exponential backoff, and each recipient is rate limited. Documents
+# whose mail is all sent or failed are deleted, PDF and all, once they are
+# older than MAIL_RETENTION_S.
+#
+#   python -m makk.outbox          # send loop
+#   python -m makk.outbox --once   # one dispatch pass
+import argparse
+import queue
+import re
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+from functools import lru_cache
+
+from makk import db
+from makk.config import (
+    MAIL_FROM, MAIL_LEASE_S, MAIL_MAX_ATTEMPTS, MAIL_RATE_PER_RECIPIENT, MAIL_RETENTION_S,
+    MAIL_RETRY_BASE_S,
+    SMTP_BATCH_SIZE, SMTP_HOST, SMTP_PASSWORD, SMTP_POOL_SIZE, SMTP_PORT,
+    SMTP_STARTTLS, SMTP_USER,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox_docs (
+    id         INTEGER PRIMARY KEY,
+    kind       TEXT NOT NULL,
+    file_name  TEXT NOT NULL,
+    pdf        BLOB NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS outbox (
+    id              INTEGER PRIMARY KEY,
+    doc_id          INTEGER NOT NULL REFERENCES outbox_docs(id),
+    recipient       TEXT NOT NULL,
+    subject         TEXT NOT NULL,
+    body            TEXT NOT NULL,
+    status          TEXT NOT NULL DEFAULT 'queued',
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error      TEXT NOT NULL DEFAULT '',
+    created_at      REAL NOT NULL,
+    sent_at         REAL,
+    claimed_at      REAL
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox(status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS outbox_doc ON outbox(doc_id);
+CREATE INDEX IF NOT EXISTS outbox_recipient ON outbox(recipient COLLATE NOCASE, status);
+"""
+
+# Delivery states. A sender claims rows as 'sending' with a lease
+# (claimed_at); rows whose lease ran out were left by a crashed sender
+# and are requeued.
+QUEUED, SENDING, SENT, FAILED = "queued", "sending", "sent", "failed"
+
+_ADDRESS = re.compile(r"[^@\s,;]+@[^@\s,;]+\.[^@\s,;]+")
+
+
+def split_recipients(text) -> list:
+    seen = []
+    for addr in _ADDRESS.findall("" if text is None else str(text)):
+        if addr.lower() not in (s.lower() for s in seen):
+            seen.append(addr)
+    return seen
+
+
+# ----------------------------
+# SMTP connection pool
+# ----------------------------
+class SmtpPool:
+    def __init__(self, host=SMTP_HOST, port=SMTP_PORT, user=SMTP_USER,
+                 password=SMTP_PASSWORD, starttls=SMTP_STARTTLS,
+                 size=SMTP_POOL_SIZE, timeout=30):
+        self.host, self.port = host, port
+        self.user, self.password = user, password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.size = size
+        self.opened = 0             # connections opened over the pool's life
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _open(self) -> smtplib.SMTP:
+        conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        conn.ehlo()
+        if self.starttls:
+            conn.starttls()
+            conn.ehlo()
+        if self.user:
+            conn.login(self.user, self.password)
+        self.opened += 1
+        return conn
+
+    def acquire(self) -> smtplib.SMTP:
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._open()
+                try:
+                    if conn.noop()[0] == 250:
+                        return conn
+                except (smtplib.SMTPException, OSError):
+                    pass
+                self._close(conn)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn: smtplib.SMTP, broken: bool = False):
+        if broken:
+            self._close(conn)
+        else:
+            self._idle.put(conn)
+        self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.quit()
+        except (smtplib.SMTPException, OSError):
+            conn.close()
+
+
+# ----------------------------
+# Outbox
+# ----------------------------
+class Outbox:
+    def __init__(self, db_path: str = None, pool: SmtpPool = None,
+                 mail_from: str = MAIL_FROM, batch_size: int = SMTP_BATCH_SIZE,
+                 max_attempts: int = MAIL_MAX_ATTEMPTS,
+                 retry_base_s: float = MAIL_RETRY_BASE_S,
+                 rate_per_recipient: int = MAIL_RATE_PER_RECIPIENT,
+                 lease_s: float = MAIL_LEASE_S, retention_s: float = MAIL_RETENTION_S):
+        self.conn = db.connect(SCHEMA, db_path)
+        cols = {r["name"] for r in self.conn.execute("PRAGMA table_info(outbox)")}
+        if "claimed_at" not in cols:   # databases created before leases
+            with self.conn:
+                self.conn.execute("ALTER TABLE outbox ADD COLUMN claimed_at REAL")
+        self.pool = pool
+        self.mail_from = mail_from
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base_s = retry_base_s
+        self.rate_per_recipient = rate_per_recipient
+        self.lease_s = lease_s
+        self.retention_s = retention_s
+        self._pruned_at = 0.0
+        self._lock = threading.Lock()
+
+    # ── Queueing ──
+    def enqueue(self, pdf: bytes, file_name: str, recipients, subject: str,
+                body: str = "", kind: str = "document") -> list:
+        now = time.time()
+        with self._lock, self.conn:
+            doc_id = self.conn.execute(
+                "INSERT INTO outbox_docs (kind, file_name, pdf, created_at) VALUES (?, ?, ?, ?)",
+                (kind, file_name, pdf, now),
+            ).lastrowid
+            ids = []
+            for rcpt in recipients:
+                ids.append(self.conn.execute(
+                    "INSERT INTO outbox (doc_id, recipient, subject, body, next_attempt_at, created_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (doc_id, rcpt, subject, body, now, now),
+                ).lastrowid)
+        return ids
+
+    def status_counts(self) -> dict:
+        with self._lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        return {r[0]: r[1] for r in rows}
+
+    def recent(self, limit: int = 200) -> list:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT o.id, d.kind, d.file_name, o.recipient, o.status, o.attempts,"
+                " o.last_error, o.created_at, o.sent_at"
+                " FROM outbox o JOIN outbox_docs d ON d.id = o.doc_id"
+                " ORDER BY o.id DESC LIMIT ?", (limit,),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def prune(self, now: float = None) -> int:
+        # Delete documents older than the retention period whose mail is
+        # all finished, with their outbox rows; returns documents deleted
+        now = time.time() if now is None else now
+        with self._lock, self.conn:
+            ids = [(r[0],) for r in self.conn.execute(
+                "SELECT d.id FROM outbox_docs d WHERE d.created_at < ? AND NOT EXISTS"
+                " (SELECT 1 FROM outbox o WHERE o.doc_id = d.id AND o.status IN (?, ?))",
+                (now - self.retention_s, QUEUED, SENDING),
+            )]
+            self.conn.executemany("DELETE FROM outbox WHERE doc_id = ?", ids)
+            self.conn.executemany("DELETE FROM outbox_docs WHERE id = ?", ids)
+        self._pruned_at = now
+        return len(ids)
+
+    # ── Sending ──
+    def requeue_stale(self, now: float = None) -> int:
+        # Only rows whose lease expired; a live sender's claims are left alone
+        now = time.time() if now is None else now
+        with self._lock, self.conn:
+            return self.conn.execute(
+                "UPDATE outbox SET status = ?, claimed_at = NULL WHERE status = ?"
+                " AND (claimed_at IS NULL OR claimed_at < ?)",
+                (QUEUED, SENDING, now - self.lease_s),
+            ).rowcount
+
+    def _sends_last_minute(self, recipient: str, now: float) -> list:
+        # Send times for recipient over the last minute, across every sender
+        # sharing the database; in-flight claims count as sends
+        return [r[0] for r in self.conn.execute(
+            "SELECT t FROM (SELECT CASE WHEN status = ? THEN sent_at ELSE claimed_at END AS t"
+            " FROM outbox WHERE recipient = ? COLLATE NOCASE AND status IN (?, ?))"
+            " WHERE t > ? ORDER BY t",
+            (SENT, recipient, SENDING, SENT, now - 60),
+        )]
+
+    def _claim(self, now: float, limit: int) -> list:
+        # BEGIN IMMEDIATE so a second sender process cannot claim the same
+        # rows or overrun a recipient's rate limit at the same moment. Rows
+        # over the limit stay queued until the oldest send leaves the window.
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            rows = self.conn.execute(
+                "SELECT o.id, o.recipient, o.subject, o.body, o.attempts, d.file_name, d.pdf"
+                " FROM outbox o JOIN outbox_docs d ON d.id = o.doc_id"
+                " WHERE o.status = ? AND o.next_attempt_at <= ?"
+                " ORDER BY o.next_attempt_at, o.id LIMIT ?",
+                (QUEUED, now, limit),
+            ).fetchall()
+            recent, ready, deferred = {}, [], []
+            for r in rows:
+                key = r["recipient"].lower()
+                if key not in recent:
+                    recent[key] = self._sends_last_minute(r["recipient"], now)
+                sent = recent[key]
+                if len(sent) < self.rate_per_recipient:
+                    sent.append(now)
+                    ready.append(r)
+                else:
+                    deferred.append((sent[-self.rate_per_recipient] + 60, r["id"]))
+            self.conn.executemany("UPDATE outbox SET status = ?, claimed_at = ? WHERE id = ?",
+                                  [(SENDING, now, r["id"]) for r in ready])
+            self.conn.executemany("UPDATE outbox SET next_attempt_at = ? WHERE id = ?", deferred)
+        return ready
+
+    def _message(self, r) -> EmailMessage:
+        msg = EmailMessage()
+        msg["From"] = self.mail_from
+        msg["To"] = r["recipient"]
+        msg["Subject"] = r["subject"]
+        msg.set_content(r["body"] or f"Please find {r['file_name']} attached.")
+        msg.add_attachment(bytes(r["pdf"]), maintype="application", subtype="pdf",
+                           filename=r["file_name"])
+        return msg
+
+    def _send_batch(self, batch) -> list:
+        # Send one batch over one pooled connection.
+        # Returns (row, error, permanent) per message.
+        results = []
+        conn = self.pool.acquire()
+        broken = False
+        try:
+            for r in batch:
+                if broken:
+                    results.append((r, "connection lost", False))
+                    continue
+                try:
+                    conn.send_message(self._message(r))
+                    results.append((r, None, False))
+                except smtplib.SMTPRecipientsRefused as e:
+                    results.append((r, f"refused: {e.recipients}", True))
+                except smtplib.SMTPResponseException as e:
+                    results.append((r, f"{e.smtp_code} {e.smtp_error!r}", e.smtp_code >= 500))
+                    try:
+                        conn.rset()
+                    except (smtplib.SMTPException, OSError):
+                        broken = True
+                except (smtplib.SMTPException, OSError) as e:
+                    results.append((r, f"{type(e).__name__}: {e}", False))
+                    broken = True
+        finally:
+            self.pool.release(conn, broken=broken)
+        return results
+
+    def _record(self, results, now: float):
+        done, retry, failed = [], [], []
+        for r, err, permanent in results:
+            attempts = r["attempts"] + 1
+            if err is None:
+                done.append((SENT, now, attempts, r["id"]))
+            elif permanent or attempts >= self.max_attempts:
+                failed.append((FAILED, attempts, err, r["id"]))
+            else:
+                backoff = self.retry_base_s * 2 ** (attempts - 1)
+                retry.append((QUEUED, attempts, err, now + backoff, r["id"]))
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "UPDATE outbox SET status = ?, sent_at = ?, attempts = ?, last_error = '' WHERE id = ?", done)
+            self.conn.executemany(
+                "UPDATE outbox SET status = ?, attempts = ?, last_error = ? WHERE id = ?", failed)
+            self.conn.executemany(
+                "UPDATE outbox SET status = ?, attempts = ?, last_error = ?, next_attempt_at = ?"
+                " WHERE id = ?", retry)
+        return len(done)
+
+    def dispatch(self, limit: int = 500) -> int:
+        # One pass over due rows; returns the number of messages sent
+        if self.pool is None:
+            self.pool = SmtpPool()
+        now = time.time()
+        if now - self._pruned_at > 3600:
+            self.prune(now)
+        self.requeue_stale(now)
+        ready = self._claim(now, limit)
+        if not ready:
+            return 0
+        batches = [ready[i:i + self.batch_size] for i in range(0, len(ready), self.batch_size)]
+        results = []
+        if batches:
+            with ThreadPoolExecutor(max_workers=self.pool.size) as ex:
+                for fut in [ex.submit(self._send_batch_safe, b) for b in batches]:
+                    results.extend(fut.result())
+        return self._record(results, time.time())
+
+    def _send_batch_safe(self, batch) -> list:
+        try:
+            return self._send_batch(batch)
+        except (smtplib.SMTPException, OSError) as e:
+            # Could not get a connection at all
+            return [(r, f"{type(e).__name__}: {e}", False) for r in batch]
+
+    def run(self, poll_s: float = 2.0):
+        try:
+            while True:
+                if not self.dispatch():
+                    time.sleep(poll_s)
+        finally:
+            if self.pool is not None:
+                self.pool.close()
+
+
+@lru_cache(maxsize=1)
+def get_outbox() -> Outbox:
+    # Shared by all sessions of the app process
+    return Outbox()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Send queued invoice and DO emails")
+    ap.add_argument("--once", action="store_true", help="run one dispatch pass and exit")
+    ap.add_argument("--db", help="database path (default: data/makk.db)")
+    args = ap.parse_args(argv)
+
+    box = Outbox(args.db)
+    if args.once:
+        print(f"sent {box.dispatch()}")
+        box.pool.close()
+    else:
+        box.run()
+
+
+if __name__ == "__main__":
+    main()
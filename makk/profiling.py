@@ -0,0 +1,147 @@
+# ----------------------------
+# On-demand render profiling
+# ----------------------------
+# Runs one build_pdf() under cProfile and saves, in PROFILE_DIR/<run>/:
+#   input.json     the document data, so the render can be repeated
+#   render.prof    pstats dump (python -m pstats, snakeviz, tuna)
+#   render.folded  collapsed stacks (flamegraph.pl, speedscope, inferno)
+#   render.pdf     the PDF that was produced
+# cProfile records caller/callee pairs rather than whole stacks, so the
+# folded stacks are rebuilt from those pairs. A function called from
+# several places has its time split between the callers in proportion to
+# the time each caller spent in it. One unprofiled render runs first, so
+# imports and font caches stay out of the profile, and functions are
+# ranked by cumulative time: the layout calls (canvas.save, wrapOn,
+# stringWidth) rather than the builtins they end in.
+#
+#   python -m makk.profiling data/profiles/<run>/input.json
+import argparse
+import cProfile
+import hashlib
+import json
+import os
+import pstats
+import time
+from datetime import date
+
+from makk.config import PROFILE_DIR, PROFILE_TOP
+
+DATE_KEYS = ("inv_date", "issued_at")
+_PROFILER = ("~", 0, "<method 'disable' of '_lsprof.Profiler' objects>")
+_MIN_S = 1e-6   # stack entries below a microsecond are left out of the folded file
+
+
+def _builder(kind: str):
+    if kind == "invoice":
+        from makk.invoice_pdf import build_pdf
+    elif kind == "do":
+        from makk.do_pdf import build_pdf
+    else:
+        raise ValueError(f"Unknown document kind {kind!r}.")
+    return build_pdf
+
+
+def _label(func) -> str:
+    file, line, name = func
+    if file == "~":
+        return name.replace(";", ":")
+    return f"{name} ({os.path.basename(file)}:{line})".replace(";", ":")
+
+
+def top_functions(stats: pstats.Stats, n: int = PROFILE_TOP) -> list:
+    rows = [
+        {"function": _label(f), "calls": nc, "cumulative_ms": round(ct * 1000, 3),
+         "self_ms": round(tt * 1000, 3)}
+        for f, (cc, nc, tt, ct, callers) in stats.stats.items() if f != _PROFILER
+    ]
+    rows.sort(key=lambda r: (-r["cumulative_ms"], -r["self_ms"]))
+    return rows[:n]
+
+
+def folded_stacks(stats: pstats.Stats) -> str:
+    # "root;caller;callee <microseconds>" lines, one per stack with self time
+    callees = {}
+    for f, (cc, nc, tt, ct, callers) in stats.stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((f, edge[3]))
+    totals = {}
+
+    def walk(f, path, on_path, t):
+        tt, ct = stats.stats[f][2], stats.stats[f][3]
+        scale = t / ct if ct else 0.0
+        self_t = tt * scale
+        for child, edge_ct in callees.get(f, ()):
+            if child in on_path:
+                continue   # recursion: the time is already counted above
+            child_t = edge_ct * scale
+            if child_t >= _MIN_S:
+                on_path.add(child)
+                walk(child, path + (child,), on_path, child_t)
+                on_path.discard(child)
+        if self_t >= _MIN_S:
+            key = ";".join(_label(x) for x in path)
+            totals[key] = totals.get(key, 0.0) + self_t
+
+    for f, (cc, nc, tt, ct, callers) in stats.stats.items():
+        if not callers and f != _PROFILER:
+            walk(f, (f,), {f}, ct)
+    return "".join(f"{k} {round(v * 1e6)}\n" for k, v in sorted(totals.items()))
+
+
+def load_input(path: str) -> tuple:
+    with open(path, encoding="utf-8") as f:
+        snap = json.load(f)
+    data = snap["data"]
+    for k in DATE_KEYS:
+        if isinstance(data.get(k), str):
+            data[k] = date.fromisoformat(data[k])
+    return snap["kind"], data
+
+
+def profile_render(kind: str, data: dict, out_dir: str = PROFILE_DIR) -> tuple:
+    # (pdf bytes, summary) for one profiled build_pdf() of data
+    build = _builder(kind)
+    snapshot = json.dumps({"kind": kind, "data": data}, default=str, indent=1)
+    digest = hashlib.md5(snapshot.encode("utf-8"), usedforsecurity=False).hexdigest()[:8]
+    run_dir = os.path.join(out_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{kind}-{digest}")
+    os.makedirs(run_dir, exist_ok=True)
+
+    build(data, deterministic=True)   # warm-up: imports, fonts, module caches
+    prof = cProfile.Profile()
+    t0 = time.perf_counter()
+    pdf = prof.runcall(build, data, deterministic=True).getvalue()
+    elapsed = time.perf_counter() - t0
+    stats = pstats.Stats(prof)
+
+    with open(os.path.join(run_dir, "input.json"), "w", encoding="utf-8") as f:
+        f.write(snapshot)
+    stats.dump_stats(os.path.join(run_dir, "render.prof"))
+    with open(os.path.join(run_dir, "render.folded"), "w", encoding="utf-8") as f:
+        f.write(folded_stacks(stats))
+    with open(os.path.join(run_dir, "render.pdf"), "wb") as f:
+        f.write(pdf)
+    return pdf, {
+        "dir": run_dir,
+        "kind": kind,
+        "total_ms": round(elapsed * 1000, 1),
+        "calls": stats.total_calls,
+        "top": top_functions(stats),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Profile one PDF render from an input snapshot")
+    ap.add_argument("input", help='input.json from an earlier profile: {"kind": ..., "data": ...}')
+    ap.add_argument("--out", default=PROFILE_DIR, help="where to save the profile")
+    args = ap.parse_args(argv)
+
+    kind, data = load_input(args.input)
+    _, summary = profile_render(kind, data, args.out)
+    print(f"{kind}: {summary['total_ms']} ms, {summary['calls']} calls -> {summary['dir']}")
+    print(f"{'cum ms':>10} {'self ms':>10} {'calls':>8}  function")
+    for r in summary["top"]:
+        print(f"{r['cumulative_ms']:>10.3f} {r['self_ms']:>10.3f} {r['calls']:>8}  {r['function']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# ----------------------------
+# Byte-reproducible PDF canvases
+# ----------------------------
+# ReportLab stamps CreationDate/ModDate with the wall clock and derives the
+# document /ID from that stamp. In deterministic mode both come from the
+# document itself: the dates from its own date field (midnight UTC) and
+# the /ID from a hash of its data, so identical inputs give identical bytes.
+import calendar
+import hashlib
+import json
+import time
+from datetime import date, datetime
+
+from reportlab.lib.utils import TimeStamp
+from reportlab.pdfgen import canvas
+
+
+def data_digest(data: dict) -> bytes:
+    blob = json.dumps(data, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.md5(blob.encode("utf-8"), usedforsecurity=False).digest()
+
+
+def _stamp(day) -> TimeStamp:
+    if isinstance(day, datetime):
+        day = day.date()
+    if not isinstance(day, date):
+        day = date.fromisoformat(str(day))
+    ts = TimeStamp(invariant=1)
+    ts.t = float(calendar.timegm(day.timetuple()))
+    ts.lt = time.gmtime(ts.t)
+    ts.YMDhms = (day.year, day.month, day.day, 0, 0, 0)
+    return ts
+
+
+def new_canvas(buf, pagesize, data: dict, doc_date, deterministic: bool = False):
+    if not deterministic:
+        return canvas.Canvas(buf, pagesize=pagesize)
+    c = canvas.Canvas(buf, pagesize=pagesize, invariant=1)
+    doc = c._doc
+    doc._timeStamp = _stamp(doc_date)
+    doc.signature = hashlib.md5(b"makk document", usedforsecurity=False)
+    doc.signature.update(data_digest(data))
+    return c
@@ -0,0 +1,220 @@
+# ----------------------------
+# Per-process draft store with a memory budget
+# ----------------------------
+# Each session keeps only a draft id in st.session_state; its line items
+# live here, shared by every session in the process. When the total goes
+# over the budget, the least recently used drafts that have been idle for
+# DRAFT_IDLE_S are spilled to disk and read back on that session's next
+# rerun. Drafts untouched for DRAFT_TTL_S are dropped. Spill files left by
+# an earlier process are adopted on startup (or deleted once expired), so
+# a restart neither loses spilled drafts nor leaves files behind.
+#
+# Each page also records its session's footprint at the end of a full
+# rerun (st.session_state measured deeply, plus the session's line-item
+# draft) so the metrics page can show bytes per session for both pages.
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from makk import lineitems
+from makk.config import (
+    DATA_DIR, DRAFT_IDLE_S, DRAFT_TTL_S, SESSION_BUDGET_BYTES, SESSION_STATS_TTL_S,
+)
+
+
+class _Entry:
+    __slots__ = ("items", "nbytes", "touched")
+
+    def __init__(self, items, touched):
+        self.items = items
+        self.nbytes = lineitems.nbytes(items)
+        self.touched = touched
+
+
+class DraftStore:
+    def __init__(self, budget: int, spill_dir: str, idle_s: float, ttl_s: float):
+        self.budget = budget
+        self.spill_dir = spill_dir
+        self.idle_s = idle_s
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._mem = OrderedDict()   # draft id -> _Entry, oldest first
+        self._spilled = {}          # draft id -> (nbytes, rows, touched)
+        self._adopt_spills()
+
+    def new(self) -> str:
+        draft_id = uuid.uuid4().hex
+        self.put(draft_id, [lineitems.LineItem()])
+        return draft_id
+
+    def get(self, draft_id: str) -> list:
+        with self._lock:
+            entry = self._mem.get(draft_id)
+            if entry is not None:
+                return entry.items
+            if draft_id in self._spilled:
+                items = self._read_spill(draft_id)
+                if items is not None:
+                    return items
+        return [lineitems.LineItem()]
+
+    def put(self, draft_id: str, items):
+        now = time.time()
+        with self._lock:
+            self._mem[draft_id] = _Entry(items, now)
+            self._mem.move_to_end(draft_id)
+            if self._spilled.pop(draft_id, None) is not None:
+                self._remove_spill(draft_id)
+            self._enforce(now, keep=draft_id)
+
+    def stats(self) -> list:
+        now = time.time()
+        with self._lock:
+            rows = [
+                {"draft": d[:8], "where": "memory", "rows": len(e.items),
+                 "bytes": e.nbytes, "idle_s": round(now - e.touched)}
+                for d, e in self._mem.items()
+            ]
+            rows += [
+                {"draft": d[:8], "where": "disk", "rows": n_rows,
+                 "bytes": nb, "idle_s": round(now - touched)}
+                for d, (nb, n_rows, touched) in self._spilled.items()
+            ]
+        return rows
+
+    def memory_bytes(self) -> int:
+        with self._lock:
+            return sum(e.nbytes for e in self._mem.values())
+
+    def draft_bytes(self, draft_id: str) -> int:
+        # In-memory bytes of one draft; 0 when spilled or unknown
+        with self._lock:
+            entry = self._mem.get(draft_id)
+            return entry.nbytes if entry is not None else 0
+
+    # ── Internals (caller holds the lock) ──
+    def _enforce(self, now: float, keep: str):
+        for draft_id in [d for d, s in self._spilled.items() if now - s[2] > self.ttl_s]:
+            del self._spilled[draft_id]
+            self._remove_spill(draft_id)
+        for draft_id in [d for d, e in self._mem.items() if now - e.touched > self.ttl_s]:
+            del self._mem[draft_id]
+
+        total = sum(e.nbytes for e in self._mem.values())
+        for draft_id in list(self._mem):
+            if total <= self.budget:
+                break
+            entry = self._mem[draft_id]
+            if draft_id == keep or now - entry.touched < self.idle_s:
+                continue
+            self._write_spill(draft_id, entry)
+            del self._mem[draft_id]
+            total -= entry.nbytes
+
+    def _adopt_spills(self):
+        try:
+            names = os.listdir(self.spill_dir)
+        except OSError:
+            return
+        now = time.time()
+        for name in names:
+            path = os.path.join(self.spill_dir, name)
+            draft_id = name[:-5] if name.endswith(".json") else None
+            items = None
+            if draft_id and now - os.path.getmtime(path) <= self.ttl_s:
+                items = self._read_spill(draft_id)
+            if items is None:   # expired, unreadable or a leftover .tmp
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            self._spilled[draft_id] = (lineitems.nbytes(items), len(items),
+                                       os.path.getmtime(path))
+
+    def _path(self, draft_id: str) -> str:
+        return os.path.join(self.spill_dir, f"{draft_id}.json")
+
+    def _write_spill(self, draft_id: str, entry: _Entry):
+        os.makedirs(self.spill_dir, exist_ok=True)
+        tmp = self._path(draft_id) + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(lineitems.dump(entry.items), f)
+        os.replace(tmp, self._path(draft_id))
+        self._spilled[draft_id] = (entry.nbytes, len(entry.items), entry.touched)
+
+    def _read_spill(self, draft_id: str):
+        try:
+            with open(self._path(draft_id)) as f:
+                return lineitems.load(json.load(f))
+        except (OSError, ValueError):
+            return None
+
+    def _remove_spill(self, draft_id: str):
+        try:
+            os.remove(self._path(draft_id))
+        except OSError:
+            pass
+
+
+def deep_nbytes(obj, seen=None) -> int:
+    # sys.getsizeof of obj and everything it holds, each object once
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    n = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        n += sum(deep_nbytes(k, seen) + deep_nbytes(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        n += sum(deep_nbytes(x, seen) for x in obj)
+    elif hasattr(obj, "__slots__"):
+        n += sum(deep_nbytes(getattr(obj, s), seen) for s in obj.__slots__ if hasattr(obj, s))
+    elif hasattr(obj, "__dict__"):
+        n += deep_nbytes(vars(obj), seen)
+    return n
+
+
+class SessionStats:
+    def __init__(self, ttl_s: float):
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._sessions = {}   # session id -> row for the metrics page
+
+    def record(self, session_id: str, page: str, state: dict, draft_bytes: int = 0):
+        now = time.time()
+        state_bytes = deep_nbytes(state)
+        with self._lock:
+            self._sessions[session_id] = {
+                "session": session_id[:8], "page": page, "keys": len(state),
+                "state_bytes": state_bytes, "draft_bytes": draft_bytes,
+                "bytes": state_bytes + draft_bytes, "touched": now,
+            }
+            for sid in [s for s, r in self._sessions.items() if now - r["touched"] > self.ttl_s]:
+                del self._sessions[sid]
+
+    def rows(self) -> list:
+        now = time.time()
+        with self._lock:
+            return [{**{k: v for k, v in r.items() if k != "touched"},
+                     "idle_s": round(now - r["touched"])} for r in self._sessions.values()]
+
+
+drafts = DraftStore(SESSION_BUDGET_BYTES, os.path.join(DATA_DIR, "spill"),
+                    DRAFT_IDLE_S, DRAFT_TTL_S)
+session_stats = SessionStats(SESSION_STATS_TTL_S)
+
+
+def record_session(page: str, draft_id: str = None):
+    # Called by a page at the end of a full rerun
+    import streamlit as st
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    session_stats.record(ctx.session_id, page, st.session_state.to_dict(),
+                         drafts.draft_bytes(draft_id) if draft_id else 0)
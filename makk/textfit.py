@@ -0,0 +1,94 @@
+# ----------------------------
+# Auto-fit text into fixed PDF boxes
+# ----------------------------
+# Standard PDF fonts scale linearly with size, so word widths are measured
+# once at 1pt and cached; wrapping at any size is then plain arithmetic.
+from functools import lru_cache
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+SIZE_STEP = 0.25
+ELLIPSIS = "..."
+
+
+@lru_cache(maxsize=8192)
+def word_width(word: str, font: str) -> float:
+    return stringWidth(word, font, 1)
+
+
+def paragraphs(text) -> list:
+    return [raw.split() for raw in ("" if text is None else str(text)).split("\n")]
+
+
+def wrap_lines(paras, font: str, size: float, max_w: float):
+    # Greedy wrap, same break points as the pages' word loops.
+    # Returns the lines and whether any single word overflows max_w.
+    space = word_width(" ", font)
+    lines = []
+    overflow = False
+    for words in paras:
+        line, units = [], 0.0
+        for word in words:
+            ww = word_width(word, font)
+            test = units + space + ww if line else ww
+            if line and test * size > max_w:
+                lines.append(" ".join(line))
+                line, units = [word], ww
+            else:
+                line.append(word)
+                units = test
+            if ww * size > max_w:
+                overflow = True
+        if line:
+            lines.append(" ".join(line))
+    return lines, overflow
+
+
+def _fits(paras, font, size, max_w, max_h, leading):
+    lines, overflow = wrap_lines(paras, font, size, max_w)
+    ok = not overflow and (len(lines) - 1) * leading * size <= max_h
+    return ok, lines
+
+
+def _clip(line: str, font: str, size: float, max_w: float) -> str:
+    if word_width(line, font) * size <= max_w:
+        return line
+    limit = max_w / size - word_width(ELLIPSIS, font)
+    while line and word_width(line, font) > limit:
+        line = line[:-1]
+    return line.rstrip() + ELLIPSIS
+
+
+def fit_text(text, font: str, max_w: float, max_h: float,
+             size: float, min_size: float, leading: float):
+    # Largest size in [min_size, size] whose wrapped lines fit the box.
+    # max_h is the distance allowed between the first and last baseline;
+    # leading is line height as a multiple of font size.
+    # Returns (size, lines); at min_size, extra lines are truncated.
+    paras = paragraphs(text)
+    ok, lines = _fits(paras, font, size, max_w, max_h, leading)
+    if ok:
+        return size, lines
+
+    # Binary search over a SIZE_STEP grid below the requested size
+    lo, hi = 0, int((size - min_size) / SIZE_STEP)
+    best = None
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        trial = min_size + mid * SIZE_STEP
+        ok, trial_lines = _fits(paras, font, trial, max_w, max_h, leading)
+        if ok:
+            best = (trial, trial_lines)
+            lo = mid + 1
+        else:
+            hi = mid - 1
+    if best:
+        return best
+
+    # Last resort: smallest size, clipped to the box
+    lines, _ = wrap_lines(paras, font, min_size, max_w)
+    keep = max(1, int(max_h / (leading * min_size)) + 1)
+    if len(lines) > keep:
+        lines = lines[:keep]
+        lines[-1] = lines[-1] + " " + ELLIPSIS
+    return min_size, [_clip(ln, font, min_size, max_w) for ln in lines]
@@ -1,534 +1,318 @@
-import io
-import requests
+import time
+import uuid
 from datetime import date
 
 import streamlit as st
-from PIL import Image as PILImage
 
-from reportlab.lib.pagesizes import LETTER
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from reportlab.lib.utils import ImageReader
+from makk.config import DO_DEFAULTS
+from makk.journal import changed_fields, get_journal, snapshot
+from makk.sessions import record_session
 
 # ----------------------------
 # Page config
 # ----------------------------
 st.set_page_config(page_title="MAKK Delivery Order Generator", layout="wide")
 
-# ----------------------------
-# Company config
-# ----------------------------
-COMPANY_NAME  = "MAKK CROSS BORDER SOLUTIONS LTD."
-COMPANY_ADDR1 = "14278 VALLEY BLVD UNIT A"
-COMPANY_ADDR2 = "LA PUENTE, CA 91746, UNITED STATES"
-COMPANY_TEL   = "TEL: 626-601-6131"
-COMPANY_EMAIL = "EMAIL: mark.chung@bester.com.tw"
-LOGO_URL      = "https://raw.githubusercontent.com/emikuo17/shipwithbtr/main/logo.jpg"
-
-def safe_str(v) -> str:
-    return "" if v is None else str(v)
-
-@st.cache_data
-def fetch_logo():
-    try:
-        r = requests.get(LOGO_URL, timeout=5)
-        r.raise_for_status()
-        return r.content
-    except Exception:
-        return None
-
-logo_bytes = fetch_logo()
-
 # ----------------------------
 # UI
 # ----------------------------
 st.title("MAKK Delivery Order Generator")
 
-# ── Header ──
-st.subheader("Header")
-h1, h2, h3 = st.columns(3)
-with h1:
-    issued_at   = st.date_input("Issued At", value=date.today())
-with h2:
-    issued_by   = st.text_input("Issued By", value="")
-with h3:
-    prepared_by = st.text_input("Prepared By", value="")
-
-st.divider()
-
-# ── Reference Numbers ──
-st.subheader("Reference Numbers")
-r1, r2, r3 = st.columns(3)
-with r1:
-    mawb_no = st.text_input("MAWB No.", value="")
-with r2:
-    hawb_no = st.text_input("HAWB No.", value="")
-with r3:
-    our_ref = st.text_input("Our Ref. No.", value="")
-
-st.divider()
-
-# ── Parties ──
-st.subheader("Parties")
-p1, p2 = st.columns(2)
-with p1:
-    shipper   = st.text_input("Shipper", value="")
-    carrier   = st.text_input("Carrier", value="")
-with p2:
-    consignee = st.text_input("Consignee", value="")
-    flight_no = st.text_input("Flight No.", value="")
+# Each section is a fragment wrapping a form: typing causes no rerun, and
+# saving a section reruns only that section. Saved values collect in one
+# per-session dict that the download button renders from when clicked,
+# and each save appends the changed fields to the draft journal. The draft
+# id is in the URL, so reloading the page replays the draft.
+def do_defaults() -> dict:
+    return {"issued_at": date.today(), **DO_DEFAULTS}
+
+def open_draft(draft_id=None):
+    draft = get_journal().replay("do", draft_id) if draft_id else None
+    st.session_state.do_draft_id = draft_id if draft else uuid.uuid4().hex
+    st.session_state.do_values = {**do_defaults(), **(draft.fields if draft else {})}
+    for k in st.session_state.do_values:
+        st.session_state.pop("do_" + k, None)
+
+if "do_draft_id" not in st.session_state:
+    open_draft(st.query_params.get("draft"))
+if st.query_params.get("draft") != st.session_state.do_draft_id:
+    st.query_params["draft"] = st.session_state.do_draft_id
+values = st.session_state.do_values
+for k, v in values.items():
+    st.session_state.setdefault("do_" + k, v)   # widget state is dropped on page switch
+
+def save(fields: dict):
+    get_journal().append("do", st.session_state.do_draft_id, changed_fields(values, fields),
+                         initial=lambda: snapshot(values))
+
+# ── Drafts ──
+with st.sidebar:
+    st.subheader("Drafts")
+    st.button("🆕 New delivery order", on_click=open_draft)
+    recent = {
+        r["draft"]: f"{r['draft'][:8]} · saved {time.strftime('%b %d %H:%M', time.localtime(r['modified']))}"
+        for r in get_journal().recent("do") if r["draft"] != st.session_state.do_draft_id
+    }
+    if recent:
+        reopen = st.selectbox("Reopen a saved draft", list(recent), format_func=recent.get)
+        st.button("📂 Open draft", on_click=open_draft, args=(reopen,))
+    if get_journal().error:
+        st.warning(f"Autosave is failing and will keep retrying: {get_journal().error}")
+
+def ref_label() -> str:
+    return values.get("our_ref") or values.get("mawb_no") or "draft"
 
-st.divider()
+# ── Header ──
+@st.fragment
+def header_section():
+    with st.form("do_header", border=False):
+        st.subheader("Header")
+        h1, h2, h3 = st.columns(3)
+        with h1:
+            issued_at   = st.date_input("Issued At", key="do_issued_at")
+        with h2:
+            issued_by   = st.text_input("Issued By", key="do_issued_by")
+        with h3:
+            prepared_by = st.text_input("Prepared By", key="do_prepared_by")
+        st.form_submit_button("💾 Save header", key="save_header")
+    save(dict(issued_at=issued_at, issued_by=issued_by, prepared_by=prepared_by))
+
+# ── Reference Numbers, Parties & Trucker ──
+@st.fragment
+def references_section():
+    with st.form("do_references", border=False):
+        st.subheader("Reference Numbers")
+        r1, r2, r3 = st.columns(3)
+        with r1:
+            mawb_no = st.text_input("MAWB No.", key="do_mawb_no")
+        with r2:
+            hawb_no = st.text_input("HAWB No.", key="do_hawb_no")
+        with r3:
+            our_ref = st.text_input("Our Ref. No.", key="do_our_ref")
+
+        st.subheader("Parties")
+        p1, p2 = st.columns(2)
+        with p1:
+            shipper   = st.text_input("Shipper", key="do_shipper")
+            carrier   = st.text_input("Carrier", key="do_carrier")
+        with p2:
+            consignee = st.text_input("Consignee", key="do_consignee")
+            flight_no = st.text_input("Flight No.", key="do_flight_no")
+
+        st.subheader("Trucker")
+        trucker_name = st.text_input("Trucker Name", key="do_trucker_name")
+        saved = st.form_submit_button("💾 Save references", key="save_references")
+
+    old_label = ref_label()
+    save(dict(
+        mawb_no=mawb_no, hawb_no=hawb_no, our_ref=our_ref,
+        shipper=shipper, carrier=carrier, consignee=consignee, flight_no=flight_no,
+        trucker_name=trucker_name,
+    ))
+    # The download file name is built outside this fragment
+    if saved and ref_label() != old_label:
+        st.rerun()
 
 # ── Routing ──
-st.subheader("Routing")
-ro1, ro2, ro3, ro4 = st.columns(4)
-with ro1:
-    place_of_receipt  = st.text_input("Place of Receipt", value="")
-with ro2:
-    receipt_etd       = st.text_input("Receipt ETD", value="")
-with ro3:
-    port_of_loading   = st.text_input("Port of Loading", value="")
-with ro4:
-    loading_etd       = st.text_input("Loading ETD", value="")
-
-ro5, ro6, ro7, ro8 = st.columns(4)
-with ro5:
-    port_of_discharge = st.text_input("Port of Discharge", value="")
-with ro6:
-    discharge_eta     = st.text_input("Discharge ETA", value="")
-with ro7:
-    place_of_delivery = st.text_input("Place of Delivery", value="")
-with ro8:
-    delivery_eta      = st.text_input("Delivery ETA", value="")
-
-st.divider()
+@st.fragment
+def routing_section():
+    with st.form("do_routing", border=False):
+        st.subheader("Routing")
+        ro1, ro2, ro3, ro4 = st.columns(4)
+        with ro1:
+            place_of_receipt  = st.text_input("Place of Receipt", key="do_place_of_receipt")
+        with ro2:
+            receipt_etd       = st.text_input("Receipt ETD", key="do_receipt_etd")
+        with ro3:
+            port_of_loading   = st.text_input("Port of Loading", key="do_port_of_loading")
+        with ro4:
+            loading_etd       = st.text_input("Loading ETD", key="do_loading_etd")
+
+        ro5, ro6, ro7, ro8 = st.columns(4)
+        with ro5:
+            port_of_discharge = st.text_input("Port of Discharge", key="do_port_of_discharge")
+        with ro6:
+            discharge_eta     = st.text_input("Discharge ETA", key="do_discharge_eta")
+        with ro7:
+            place_of_delivery = st.text_input("Place of Delivery", key="do_place_of_delivery")
+        with ro8:
+            delivery_eta      = st.text_input("Delivery ETA", key="do_delivery_eta")
+        st.form_submit_button("💾 Save routing", key="save_routing")
+    save(dict(
+        place_of_receipt=place_of_receipt, receipt_etd=receipt_etd,
+        port_of_loading=port_of_loading, loading_etd=loading_etd,
+        port_of_discharge=port_of_discharge, discharge_eta=discharge_eta,
+        place_of_delivery=place_of_delivery, delivery_eta=delivery_eta,
+    ))
 
 # ── Cargo Details ──
-st.subheader("Cargo Details")
-g1, g2, g3 = st.columns(3)
-with g1:
-    total_packages   = st.text_input("Total Packages", value="")
-    package_type     = st.text_input("Package Type (e.g. CRATE, BOX)", value="")
-    port_cutoff      = st.text_input("Port Cut-Off", value="")
-with g2:
-    gross_weight_kg  = st.text_input("Gross Weight (KGS)", value="")
-    gross_weight_lbs = st.text_input("Gross Weight (LBS)", value="")
-with g3:
-    measurement_cbm  = st.text_input("Measurement (CBM)", value="")
-    measurement_cft  = st.text_input("Measurement (CFT)", value="")
-
-commodity = st.text_input("Commodity", value="")
-po_no     = st.text_input("PO No.", value="")
+@st.fragment
+def cargo_section():
+    with st.form("do_cargo", border=False):
+        st.subheader("Cargo Details")
+        g1, g2, g3 = st.columns(3)
+        with g1:
+            total_packages   = st.text_input("Total Packages", key="do_total_packages")
+            package_type     = st.text_input("Package Type (e.g. CRATE, BOX)", key="do_package_type")
+            port_cutoff      = st.text_input("Port Cut-Off", key="do_port_cutoff")
+        with g2:
+            gross_weight_kg  = st.text_input("Gross Weight (KGS)", key="do_gross_weight_kg")
+            gross_weight_lbs = st.text_input("Gross Weight (LBS)", key="do_gross_weight_lbs")
+        with g3:
+            measurement_cbm  = st.text_input("Measurement (CBM)", key="do_measurement_cbm")
+            measurement_cft  = st.text_input("Measurement (CFT)", key="do_measurement_cft")
+
+        commodity = st.text_input("Commodity", key="do_commodity")
+        po_no     = st.text_input("PO No.", key="do_po_no")
+        st.form_submit_button("💾 Save cargo", key="save_cargo")
+    save(dict(
+        total_packages=total_packages, package_type=package_type, port_cutoff=port_cutoff,
+        gross_weight_kg=gross_weight_kg, gross_weight_lbs=gross_weight_lbs,
+        measurement_cbm=measurement_cbm, measurement_cft=measurement_cft,
+        commodity=commodity, po_no=po_no,
+    ))
+
+# ── Locations ──
+@st.fragment
+def locations_section():
+    with st.form("do_locations", border=False):
+        st.subheader("Empty Pick Up Location")
+        empty_pickup_loc = st.text_area("Empty Pick Up Location", height=80, key="do_empty_pickup_loc")
+        ep1, ep2 = st.columns(2)
+        with ep1:
+            empty_ref_no = st.text_input("Empty Pick Up Ref. No.", key="do_empty_ref_no")
+        with ep2:
+            empty_date   = st.text_input("Empty Pick Up Date", key="do_empty_date")
+
+        st.subheader("Freight Pick Up Location")
+        freight_pickup_loc = st.text_area("Freight Pick Up Location", height=100, key="do_freight_pickup_loc")
+        fp1, fp2 = st.columns(2)
+        with fp1:
+            freight_ref_no = st.text_input("Freight Pick Up Ref. No.", key="do_freight_ref_no")
+        with fp2:
+            freight_date   = st.text_input("Freight Pick Up Date/Time", key="do_freight_date")
+
+        st.subheader("Loaded Return / Delivery To")
+        delivery_to = st.text_area("Delivery To", height=100, key="do_delivery_to")
+        dl1, dl2 = st.columns(2)
+        with dl1:
+            delivery_ref_no = st.text_input("Delivery Ref. No.", key="do_delivery_ref_no")
+        with dl2:
+            delivery_date   = st.text_input("Delivery Date", key="do_delivery_date")
+
+        st.subheader("Bill To")
+        bill_to     = st.text_area("Bill To", height=80, key="do_bill_to")
+        bill_ref_no = st.text_input("Bill To Ref. No.", key="do_bill_ref_no")
+        st.form_submit_button("💾 Save locations", key="save_locations")
+    save(dict(
+        empty_pickup_loc=empty_pickup_loc, empty_ref_no=empty_ref_no, empty_date=empty_date,
+        freight_pickup_loc=freight_pickup_loc, freight_ref_no=freight_ref_no,
+        freight_date=freight_date,
+        delivery_to=delivery_to, delivery_ref_no=delivery_ref_no, delivery_date=delivery_date,
+        bill_to=bill_to, bill_ref_no=bill_ref_no,
+    ))
 
+# ── Bottom Boxes ──
+@st.fragment
+def pod_section():
+    with st.form("do_pod", border=False):
+        st.subheader("P.O.D Notice & Instruction")
+        b1, b2 = st.columns(2)
+        with b1:
+            pod_notice = st.text_area("P.O.D Notice", height=150, key="do_pod_notice")
+        with b2:
+            instruction = st.text_area("Instruction", height=150, key="do_instruction")
+
+        footer_note = st.text_input("Footer Note (bottom left)", key="do_footer_note")
+        auto_fit    = st.checkbox("Auto-fit long text to its box", key="do_auto_fit")
+        st.form_submit_button("💾 Save notice & instruction", key="save_pod")
+    save(dict(pod_notice=pod_notice, instruction=instruction,
+              footer_note=footer_note, auto_fit=auto_fit))
+
+header_section()
 st.divider()
-
-# ── Trucker ──
-st.subheader("Trucker")
-trucker_name = st.text_input("Trucker Name", value="")
-
+references_section()
 st.divider()
-
-# ── Empty Pick Up ──
-st.subheader("Empty Pick Up Location")
-empty_pickup_loc = st.text_area("Empty Pick Up Location", value="", height=80)
-ep1, ep2 = st.columns(2)
-with ep1:
-    empty_ref_no = st.text_input("Empty Pick Up Ref. No.", value="")
-with ep2:
-    empty_date   = st.text_input("Empty Pick Up Date", value="")
-
+routing_section()
 st.divider()
-
-# ── Freight Pick Up ──
-st.subheader("Freight Pick Up Location")
-freight_pickup_loc = st.text_area("Freight Pick Up Location", value="", height=100)
-fp1, fp2 = st.columns(2)
-with fp1:
-    freight_ref_no = st.text_input("Freight Pick Up Ref. No.", value="")
-with fp2:
-    freight_date   = st.text_input("Freight Pick Up Date/Time", value="")
-
+cargo_section()
 st.divider()
-
-# ── Loaded Return / Delivery To ──
-st.subheader("Loaded Return / Delivery To")
-delivery_to = st.text_area("Delivery To", value="", height=100)
-dl1, dl2 = st.columns(2)
-with dl1:
-    delivery_ref_no = st.text_input("Delivery Ref. No.", value="")
-with dl2:
-    delivery_date   = st.text_input("Delivery Date", value="")
-
+locations_section()
 st.divider()
-
-# ── Bill To ──
-st.subheader("Bill To")
-bill_to     = st.text_area("Bill To", value="", height=80)
-bill_ref_no = st.text_input("Bill To Ref. No.", value="")
-
-st.divider()
-
-# ── Bottom Boxes ──
-st.subheader("P.O.D Notice & Instruction")
-b1, b2 = st.columns(2)
-with b1:
-    pod_notice = st.text_area("P.O.D Notice", value=(
-        "P.O.D REQUIRED WITH BILLING INVOICE\n"
-        "PLEASE FAX PROOF OF DELIVERY TO 909-895-7579\n\n"
-        "NOTICE: BAD ORDER PACKAGES MUST BE SIGNED FOR AS IN "
-        "CONDITION RECEIVED.\n\n"
-        "ALL PIER CHARGES FOR ACCOUNT OF RECEIVER UNLESS "
-        "OTHERWISE SPECIFIED."
-    ), height=150)
-with b2:
-    instruction = st.text_area("Instruction", value="", height=150)
-
-footer_note = st.text_input("Footer Note (bottom left)", value="DO NOT BREAK DOWN PALLET")
+pod_section()
 
 # ----------------------------
 # PDF Builder
 # ----------------------------
-def build_pdf() -> io.BytesIO:
-    buf = io.BytesIO()
-    c   = canvas.Canvas(buf, pagesize=LETTER)
-    W, H = LETTER
-    ml  = 0.35 * inch
-    mr  = W - 0.35 * inch
-    TW  = mr - ml
-
-    # ── Helpers ──────────────────────────────────────────────────
-    def hline(yy, x0=ml, x1=mr, lw=0.5):
-        c.setLineWidth(lw)
-        c.line(x0, yy, x1, yy)
-
-    def vline(xx, y0, y1, lw=0.5):
-        c.setLineWidth(lw)
-        c.line(xx, y0, xx, y1)
-
-    def box(x, y, w, h, lw=0.5):
-        c.setLineWidth(lw)
-        c.rect(x, y, w, h)
-
-    def lbl(text, x, yy, size=6):
-        c.setFont("Helvetica", size)
-        c.setFillColor(colors.black)
-        c.drawString(x, yy, safe_str(text))
-
-    def val(text, x, yy, size=8, bold=False):
-        c.setFont("Helvetica-Bold" if bold else "Helvetica", size)
-        c.setFillColor(colors.black)
-        c.drawString(x, yy, safe_str(text))
-
-    def mltext(text, x, yy, max_w, size=7.5, lh=0.145*inch):
-        c.setFont("Helvetica", size)
-        c.setFillColor(colors.black)
-        for raw_line in safe_str(text).split("\n"):
-            words = raw_line.split()
-            line  = ""
-            for w_ in words:
-                test = (line + " " + w_).strip()
-                if c.stringWidth(test, "Helvetica", size) > max_w:
-                    c.drawString(x, yy, line)
-                    yy -= lh
-                    line = w_
-                else:
-                    line = test
-            if line:
-                c.drawString(x, yy, line)
-                yy -= lh
-        return yy
-
-    PAD  = 0.06 * inch   # inner padding
-    y    = H - 0.28 * inch
-
-    # ════════════════════════════════════════════════════════════
-    # HEADER
-    # ════════════════════════════════════════════════════════════
-    hdr_h   = 1.05 * inch
-    hdr_bot = y - hdr_h
-    mid_hdr = W * 0.52   # left/right split
-
-    # Left: logo + company info
-    if logo_bytes:
-        try:
-            pil  = PILImage.open(io.BytesIO(logo_bytes))
-            iw, ih = pil.size
-            lw_  = 0.85 * inch
-            lh_  = lw_ * (ih / iw)
-            c.drawImage(ImageReader(io.BytesIO(logo_bytes)),
-                        ml, hdr_bot + (hdr_h - lh_) / 2,
-                        width=lw_, height=lh_, mask="auto")
-        except Exception:
-            pass
-
-    tx = ml + 1.0 * inch
-    c.setFont("Helvetica-Bold", 12)
-    c.drawString(tx, y - 0.18*inch, COMPANY_NAME)
-    c.setFont("Helvetica", 7.5)
-    for i, ln in enumerate([COMPANY_ADDR1, COMPANY_ADDR2,
-                             COMPANY_TEL, COMPANY_EMAIL]):
-        c.drawString(tx, y - 0.35*inch - i*0.145*inch, ln)
-    if prepared_by.strip():
-        c.setFont("Helvetica-Bold", 7)
-        c.drawString(tx, y - 0.35*inch - 4*0.145*inch,
-                     f"Prepared by {prepared_by}   "
-                     f"{issued_at.strftime('%m-%d-%Y')} (PDT)")
-
-    # Right: title box + issued row
-    title_top = y - 0.04*inch
-    title_bot = y - 0.60*inch
-    box(mid_hdr, title_bot, mr - mid_hdr, title_top - title_bot, lw=1)
-    c.setFont("Helvetica-Bold", 15)
-    c.drawCentredString((mid_hdr + mr) / 2,
-                        (title_top + title_bot) / 2 - 0.07*inch,
-                        "PICKUP & DELIVERY ORDER")
-
-    iss_top = title_bot
-    iss_bot = iss_top - 0.32*inch
-    iss_mid = (mid_hdr + mr) / 2
-    box(mid_hdr, iss_bot, mr - mid_hdr, iss_top - iss_bot, lw=0.5)
-    vline(iss_mid, iss_bot, iss_top)
-    lbl("ISSUED AT :", mid_hdr + PAD, iss_top - 0.10*inch, size=6)
-    val(issued_at.strftime("%m-%d-%Y"),
-        mid_hdr + PAD, iss_top - 0.22*inch, size=8)
-    lbl("ISSUED BY :", iss_mid + PAD, iss_top - 0.10*inch, size=6)
-    val(issued_by.upper(), iss_mid + PAD, iss_top - 0.22*inch, size=8)
-
-    hline(hdr_bot, lw=1.2)
-    y = hdr_bot
-
-    # ════════════════════════════════════════════════════════════
-    # ROW 1 — TRUCKER (left) | MAWB / HAWB / OUR REF (right)
-    # ════════════════════════════════════════════════════════════
-    R1H   = 0.52 * inch
-    r1bot = y - R1H
-    LCOL  = ml + TW * 0.44   # left/right column split
-
-    box(ml, r1bot, LCOL - ml, R1H)
-    lbl("TRUCKER", ml + PAD, y - 0.10*inch)
-    val(trucker_name.upper(), ml + PAD, y - 0.28*inch, size=9, bold=True)
-
-    rw  = mr - LCOL
-    box(LCOL, r1bot, rw, R1H)
-    h1x = LCOL + rw * 0.45
-    h2x = LCOL + rw * 0.45
-    vline(h1x, r1bot, y)
-    hmid = y - R1H / 2
-    hline(hmid, LCOL, mr)
-
-    lbl("MAWB NO.",      LCOL + PAD,   y - 0.10*inch)
-    lbl("HAWB NO.",      h1x  + PAD,   y - 0.10*inch)
-    val(mawb_no,         LCOL + PAD,   y - 0.24*inch)
-    val(hawb_no,         h1x  + PAD,   y - 0.22*inch, size=10, bold=True)
-    lbl("OUR REF. NO.",  LCOL + PAD,   hmid - 0.10*inch)
-    val(our_ref,         LCOL + PAD,   hmid - 0.24*inch)
-
-    hline(r1bot)
-    y = r1bot
-
-    # ════════════════════════════════════════════════════════════
-    # ROW 2 — EMPTY PICKUP (left) | SHIPPER/CONSIGNEE/CARRIER/FLIGHT (right)
-    # ════════════════════════════════════════════════════════════
-    R2H   = 1.05 * inch
-    r2bot = y - R2H
-
-    box(ml, r2bot, LCOL - ml, R2H)
-    lbl("EMPTY PICK UP LOCATION", ml + PAD, y - 0.10*inch)
-    mltext(empty_pickup_loc, ml + PAD, y - 0.22*inch, LCOL - ml - PAD*2)
-    lbl("REF. NO. :", ml + PAD,       r2bot + 0.24*inch, size=6)
-    val(empty_ref_no,  ml + 0.75*inch, r2bot + 0.24*inch)
-    lbl("DATE:",       ml + PAD,       r2bot + 0.10*inch, size=6)
-    val(empty_date,    ml + 0.50*inch, r2bot + 0.10*inch)
-
-    rw  = mr - LCOL
-    hw  = rw / 2
-    rm  = y - R2H / 2
-    box(LCOL, r2bot, rw, R2H)
-    vline(LCOL + hw, r2bot, y)
-    hline(rm, LCOL, mr)
-    lbl("SHIPPER",    LCOL     + PAD, y  - 0.10*inch)
-    lbl("CONSIGNEE",  LCOL+hw  + PAD, y  - 0.10*inch)
-    val(shipper.upper(),   LCOL     + PAD, y  - 0.24*inch, bold=True)
-    val(consignee.upper(), LCOL+hw  + PAD, y  - 0.24*inch, bold=True)
-    lbl("CARRIER",    LCOL     + PAD, rm - 0.10*inch)
-    lbl("FLIGHT NO.", LCOL+hw  + PAD, rm - 0.10*inch)
-    val(carrier,      LCOL     + PAD, rm - 0.24*inch)
-    val(flight_no,    LCOL+hw  + PAD, rm - 0.24*inch)
-
-    hline(r2bot)
-    y = r2bot
-
-    # ════════════════════════════════════════════════════════════
-    # ROW 3 — FREIGHT PICKUP (left) | ROUTING top 2 rows (right)
-    # ════════════════════════════════════════════════════════════
-    R3H   = 1.15 * inch
-    r3bot = y - R3H
-
-    box(ml, r3bot, LCOL - ml, R3H)
-    lbl("FREIGHT PICK UP LOCATION", ml + PAD, y - 0.10*inch)
-    mltext(freight_pickup_loc, ml + PAD, y - 0.22*inch, LCOL - ml - PAD*2)
-    lbl("REF. NO. :", ml + PAD,        r3bot + 0.24*inch, size=6)
-    val(freight_ref_no, ml + 0.75*inch, r3bot + 0.24*inch)
-    lbl("DATE:",        ml + PAD,        r3bot + 0.10*inch, size=6)
-    val(freight_date,   ml + 0.50*inch,  r3bot + 0.10*inch)
-
-    rw  = mr - LCOL
-    hw  = rw / 2
-    rm  = y - R3H / 2
-    box(LCOL, r3bot, rw, R3H)
-    vline(LCOL + hw, r3bot, y)
-    hline(rm, LCOL, mr)
-    lbl("PLACE OF RECEIPT", LCOL    + PAD, y  - 0.10*inch)
-    lbl("ETD",              LCOL+hw + PAD, y  - 0.10*inch)
-    val(place_of_receipt,   LCOL    + PAD, y  - 0.24*inch, bold=True)
-    val(receipt_etd,        LCOL+hw + PAD, y  - 0.24*inch)
-    lbl("PORT OF LOADING",  LCOL    + PAD, rm - 0.10*inch)
-    lbl("ETD",              LCOL+hw + PAD, rm - 0.10*inch)
-    val(port_of_loading,    LCOL    + PAD, rm - 0.24*inch, bold=True)
-    val(loading_etd,        LCOL+hw + PAD, rm - 0.24*inch)
-
-    hline(r3bot)
-    y = r3bot
-
-    # ════════════════════════════════════════════════════════════
-    # ROW 4 — DELIVERY TO (left) | PORT OF DISCHARGE / DELIVERY (right)
-    # ════════════════════════════════════════════════════════════
-    R4H   = 1.15 * inch
-    r4bot = y - R4H
-
-    box(ml, r4bot, LCOL - ml, R4H)
-    lbl("LOADED RETURN/DELIVERY TO", ml + PAD, y - 0.10*inch)
-    mltext(delivery_to, ml + PAD, y - 0.22*inch, LCOL - ml - PAD*2)
-    lbl("REF. NO. :", ml + PAD,         r4bot + 0.24*inch, size=6)
-    val(delivery_ref_no, ml + 0.75*inch, r4bot + 0.24*inch)
-    lbl("DATE:",         ml + PAD,        r4bot + 0.10*inch, size=6)
-    val(delivery_date,   ml + 0.50*inch,  r4bot + 0.10*inch)
-
-    rw  = mr - LCOL
-    hw  = rw / 2
-    rm  = y - R4H / 2
-    box(LCOL, r4bot, rw, R4H)
-    vline(LCOL + hw, r4bot, y)
-    hline(rm, LCOL, mr)
-    lbl("PORT OF DISCHARGE", LCOL    + PAD, y  - 0.10*inch)
-    lbl("ETA",               LCOL+hw + PAD, y  - 0.10*inch)
-    val(port_of_discharge,   LCOL    + PAD, y  - 0.24*inch, bold=True)
-    val(discharge_eta,       LCOL+hw + PAD, y  - 0.24*inch)
-    lbl("PLACE OF DELIVERY", LCOL    + PAD, rm - 0.10*inch)
-    lbl("ETA",               LCOL+hw + PAD, rm - 0.10*inch)
-    val(place_of_delivery,   LCOL    + PAD, rm - 0.24*inch, bold=True)
-    val(delivery_eta,        LCOL+hw + PAD, rm - 0.24*inch)
-
-    hline(r4bot)
-    y = r4bot
-
-    # ════════════════════════════════════════════════════════════
-    # ROW 5 — BILL TO (left) | CARGO DETAILS (right)
-    # ════════════════════════════════════════════════════════════
-    R5H   = 1.1 * inch
-    r5bot = y - R5H
-
-    box(ml, r5bot, LCOL - ml, R5H)
-    lbl("BILL TO", ml + PAD, y - 0.10*inch)
-    mltext(bill_to, ml + PAD, y - 0.22*inch, LCOL - ml - PAD*2)
-    lbl("REF. NO. :", ml + PAD,       r5bot + 0.10*inch, size=6)
-    val(bill_ref_no,  ml + 0.75*inch,  r5bot + 0.10*inch)
-
-    # Cargo right side — 3 rows
-    rw  = mr - LCOL
-    hw  = rw / 2
-    th  = R5H / 3
-    box(LCOL, r5bot, rw, R5H)
-    vline(LCOL + hw, r5bot, y)
-    hline(y - th,    LCOL, mr)
-    hline(y - 2*th,  LCOL, mr)
-
-    # Row a: total packages | port cut-off
-    lbl("TOTAL PACKAGES",  LCOL    + PAD, y - 0.10*inch)
-    lbl("PORT CUT-OFF",    LCOL+hw + PAD, y - 0.10*inch)
-    val(f"{total_packages}  {package_type}".strip(),
-        LCOL + PAD, y - 0.26*inch, bold=True)
-    val(port_cutoff, LCOL+hw + PAD, y - 0.26*inch)
-
-    # Row b: gross weight
-    lbl("GROSS WEIGHT", LCOL + PAD, y - th - 0.10*inch)
-    val(f"{gross_weight_kg} KGS" if gross_weight_kg else "",
-        LCOL    + PAD, y - th - 0.26*inch)
-    val(f"{gross_weight_lbs} LBS" if gross_weight_lbs else "",
-        LCOL+hw + PAD, y - th - 0.26*inch)
-
-    # Row c: measurement
-    lbl("MEASUREMENT", LCOL + PAD, y - 2*th - 0.10*inch)
-    val(f"{measurement_cbm} CBM" if measurement_cbm else "",
-        LCOL    + PAD, y - 2*th - 0.26*inch)
-    val(f"{measurement_cft} CFT" if measurement_cft else "",
-        LCOL+hw + PAD, y - 2*th - 0.26*inch)
-
-    # Commodity / PO at bottom of cargo box
-    lbl("COMMODITY", LCOL    + PAD, r5bot + 0.30*inch)
-    lbl("PO NO.",    LCOL+hw + PAD, r5bot + 0.30*inch)
-    val(commodity.upper(), LCOL    + PAD, r5bot + 0.12*inch, bold=True)
-    val(po_no,             LCOL+hw + PAD, r5bot + 0.12*inch)
-
-    hline(r5bot, lw=1.2)
-    y = r5bot
-
-    # ════════════════════════════════════════════════════════════
-    # BOTTOM — POD box (left) | Instruction (right)
-    # ════════════════════════════════════════════════════════════
-    BOT_H   = 1.25 * inch
-    bot_bot = y - BOT_H
-    mid_bot = ml + TW * 0.44
-
-    box(ml,      bot_bot, mid_bot - ml,  BOT_H)
-    box(mid_bot, bot_bot, mr - mid_bot,  BOT_H)
-    lbl("INSTRUCTION", mid_bot + PAD, y - 0.10*inch)
-
-    mltext(pod_notice,   ml      + PAD, y - 0.10*inch,
-           mid_bot - ml - PAD*2, size=7.5)
-    mltext(instruction,  mid_bot + PAD, y - 0.22*inch,
-           mr - mid_bot - PAD*2, size=8)
-
-    hline(bot_bot, lw=1.2)
-    y = bot_bot
-
-    # ════════════════════════════════════════════════════════════
-    # FOOTER
-    # ════════════════════════════════════════════════════════════
-    FT_H    = 0.38 * inch
-    ft_bot  = y - FT_H
-    mid_ft  = ml + TW * 0.44
-
-    box(ml,     ft_bot, mid_ft - ml,  FT_H)
-    box(mid_ft, ft_bot, mr - mid_ft,  FT_H)
-
-    c.setFont("Helvetica-Bold", 11)
-    c.drawString(ml + PAD,
-                 ft_bot + FT_H/2 - 0.07*inch,
-                 safe_str(footer_note))
-
-    c.setFont("Helvetica", 7)
-    c.drawRightString(mr - PAD,
-                      ft_bot + FT_H/2 + 0.03*inch,
-                      "You are requested to inform us immediately of any occurrence.")
-    c.drawRightString(mr - PAD,
-                      ft_bot + FT_H/2 - 0.12*inch,
-                      "Thank You for your service !")
-
-    c.showPage()
-    c.save()
-    buf.seek(0)
-    return buf
+def render_pdf():
+    # Runs only when the download is clicked, from the last saved values;
+    # reportlab and PIL load here rather than on page load
+    from makk.do_pdf import build_pdf
+    return build_pdf(values, deterministic=True)
 
 # ----------------------------
 # Download button
 # ----------------------------
-ref_label = our_ref or mawb_no or "draft"
+st.caption("Save each section before downloading; unsaved edits are not on the PDF.")
 st.download_button(
     "⬇️ Download Delivery Order PDF",
-    data=build_pdf(),
-    file_name=f"MAKK_DO_{ref_label}.pdf",
+    data=render_pdf,
+    file_name=f"MAKK_DO_{ref_label()}.pdf",
     mime="application/pdf",
 )
+
+# ----------------------------
+# Email to trucker
+# ----------------------------
+@st.fragment
+def email_section():
+    with st.form("do_email", border=False):
+        email_to = st.text_input("Email to trucker (comma-separated)", value="")
+        send = st.form_submit_button("📧 Queue DO email", key="queue_email")
+    if send:
+        from makk.outbox import get_outbox, split_recipients
+        recipients = split_recipients(email_to)
+        if not recipients:
+            st.warning("Enter at least one email address.")
+        else:
+            get_outbox().enqueue(
+                render_pdf().getvalue(), f"MAKK_DO_{ref_label()}.pdf", recipients,
+                subject=f"Pickup & Delivery Order {ref_label()}",
+                kind="do",
+            )
+            st.success(f"Queued for {', '.join(recipients)}. See the Outbox page for delivery status.")
+
+email_section()
+
+# ----------------------------
+# Render profiling
+# ----------------------------
+# Opt-in: profiles one build_pdf() of the saved values and keeps the
+# stats, with the input, under data/profiles/
+if st.sidebar.toggle("🔬 Profile PDF rendering", key="profile_do"):
+    st.subheader("Render profile")
+    if st.button("🔬 Profile this render"):
+        from makk.profiling import profile_render
+        st.session_state.do_profile = profile_render("do", values)[1]
+    prof = st.session_state.get("do_profile")
+    if prof:
+        st.caption(f"{prof['total_ms']} ms, {prof['calls']:,} calls · saved to {prof['dir']}")
+        st.dataframe(prof["top"], hide_index=True, use_container_width=True)
+
+        def profile_file(name):
+            with open(f"{prof['dir']}/{name}", "rb") as f:
+                return f.read()
+
+        p1, p2, _ = st.columns([1, 1, 2])
+        with p1:
+            st.download_button("⬇️ Flame graph stacks (.folded)", data=lambda: profile_file("render.folded"),
+                               file_name=f"MAKK_DO_{ref_label()}-render.folded", mime="text/plain")
+        with p2:
+            st.download_button("⬇️ cProfile stats (.prof)", data=lambda: profile_file("render.prof"),
+                               file_name=f"MAKK_DO_{ref_label()}-render.prof",
+                               mime="application/octet-stream")
+
+# ----------------------------
+# Session metrics
+# ----------------------------
+record_session("do")
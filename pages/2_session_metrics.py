@@ -0,0 +1,58 @@
+import streamlit as st
+
+from makk.config import SESSION_BUDGET_BYTES
+from makk.sessions import drafts, session_stats
+
+# ----------------------------
+# Page config
+# ----------------------------
+st.set_page_config(page_title="MAKK Session Metrics", layout="wide")
+
+# ----------------------------
+# UI
+# ----------------------------
+st.title("Session Metrics")
+
+# ── Sessions ──
+sessions = session_stats.rows()
+total = sum(r["bytes"] for r in sessions)
+
+s1, s2, s3 = st.columns(3)
+s1.metric("Active sessions", len(sessions))
+s2.metric("Session memory", f"{total / 1024:,.1f} KiB")
+s3.metric("Average per session", f"{total / len(sessions) / 1024:,.1f} KiB" if sessions else "–")
+
+st.subheader("Bytes per session")
+st.caption(
+    "st.session_state measured deeply (fields, widget state, the DO draft), plus the "
+    "session's in-memory invoice line items. Updated at the end of each full rerun."
+)
+st.dataframe(
+    sorted(sessions, key=lambda r: -r["bytes"]),
+    use_container_width=True,
+    hide_index=True,
+)
+
+# ── Line-item draft store ──
+rows = drafts.stats()
+in_memory = [r for r in rows if r["where"] == "memory"]
+used = sum(r["bytes"] for r in in_memory)
+
+st.subheader("Invoice line-item drafts")
+m1, m2, m3, m4 = st.columns(4)
+m1.metric("Drafts in memory", len(in_memory))
+m2.metric("Drafts spilled to disk", len(rows) - len(in_memory))
+m3.metric("Memory used", f"{used / 1024:,.1f} KiB")
+m4.metric("Budget", f"{SESSION_BUDGET_BYTES / 1024 / 1024:,.0f} MiB")
+
+if in_memory:
+    st.caption(f"Average {used / len(in_memory):,.0f} bytes per in-memory draft")
+
+st.dataframe(
+    sorted(rows, key=lambda r: -r["bytes"]),
+    use_container_width=True,
+    hide_index=True,
+)
+
+if st.button("🔄 Refresh"):
+    st.rerun()
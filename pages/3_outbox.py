@@ -0,0 +1,58 @@
+from datetime import datetime
+
+import streamlit as st
+
+from makk.outbox import get_outbox
+
+# ----------------------------
+# Page config
+# ----------------------------
+st.set_page_config(page_title="MAKK Outbox", layout="wide")
+
+def when(ts) -> str:
+    return "" if ts is None else datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+
+# ----------------------------
+# UI
+# ----------------------------
+st.title("Outbox")
+st.caption("Queued emails are sent by `python -m makk.outbox`, or by the button below.")
+
+box = get_outbox()
+counts = box.status_counts()
+c1, c2, c3, c4 = st.columns(4)
+c1.metric("Queued", counts.get("queued", 0))
+c2.metric("Sending", counts.get("sending", 0))
+c3.metric("Sent", counts.get("sent", 0))
+c4.metric("Failed", counts.get("failed", 0))
+
+b1, b2, _ = st.columns([1, 1, 3])
+with b1:
+    if st.button("📤 Send queued now"):
+        try:
+            st.success(f"Sent {box.dispatch()} message(s).")
+        except OSError as e:
+            st.error(f"Could not reach the mail server: {e}")
+with b2:
+    if st.button("🔄 Refresh"):
+        st.rerun()
+
+rows = box.recent()
+st.dataframe(
+    [
+        {
+            "ID": r["id"],
+            "Type": r["kind"],
+            "File": r["file_name"],
+            "Recipient": r["recipient"],
+            "Status": r["status"],
+            "Attempts": r["attempts"],
+            "Queued At": when(r["created_at"]),
+            "Sent At": when(r["sent_at"]),
+            "Last Error": r["last_error"],
+        }
+        for r in rows
+    ],
+    use_container_width=True,
+    hide_index=True,
+)
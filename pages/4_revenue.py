@@ -0,0 +1,95 @@
+import time
+
+import streamlit as st
+
+from makk.helpers import money
+from makk.ledger import STATUSES, LedgerError, dollars, get_ledger
+
+# ----------------------------
+# Page config
+# ----------------------------
+st.set_page_config(page_title="MAKK Revenue & Receivables", layout="wide")
+
+# ----------------------------
+# UI
+# ----------------------------
+st.title("Revenue & Receivables")
+
+ledger = get_ledger()
+periods = ledger.periods()
+
+f1, f2, f3, f4 = st.columns(4)
+with f1:
+    customer = st.selectbox("Customer", ["All"] + ledger.customers())
+with f2:
+    period_from = st.selectbox("From", periods or ["—"], index=0)
+with f3:
+    period_to = st.selectbox("To", periods or ["—"], index=max(len(periods) - 1, 0))
+with f4:
+    statuses = st.multiselect("Status", STATUSES, default=["issued", "paid"])
+
+group_by = st.multiselect("Group by", ["customer_id", "period", "status"],
+                          default=["customer_id", "period"])
+
+filters = dict(
+    customer_id=None if customer == "All" else customer,
+    period_from=period_from if periods else None,
+    period_to=period_to if periods else None,
+    statuses=statuses,   # an empty selection shows nothing, not every status
+)
+if not statuses:
+    st.info("Select at least one status.")
+
+t0 = time.perf_counter()
+overall = ledger.totals(group_by=(), **filters)
+rows = ledger.totals(group_by=group_by, **filters)
+by_status = {r["status"]: r for r in ledger.totals(group_by=("status",), **filters)}
+elapsed_ms = (time.perf_counter() - t0) * 1000
+
+summary = overall[0] if overall else {"n_invoices": 0, "subtotal": 0, "sales_tax": 0, "total": 0}
+m1, m2, m3, m4 = st.columns(4)
+m1.metric("Invoices", summary["n_invoices"])
+m2.metric("Subtotal", money(dollars(summary["subtotal"])))
+m3.metric("Sales Tax", money(dollars(summary["sales_tax"])))
+m4.metric("Total", money(dollars(summary["total"])))
+st.caption(
+    f"Outstanding receivables: {money(dollars(by_status.get('issued', {}).get('total', 0)))}"
+    f"  ·  answered in {elapsed_ms:.1f} ms"
+)
+
+st.dataframe(
+    [
+        {
+            **{c: r[c] for c in group_by},
+            "Invoices": r["n_invoices"],
+            "Subtotal": dollars(r["subtotal"]),
+            "Sales Tax": dollars(r["sales_tax"]),
+            "Total": dollars(r["total"]),
+        }
+        for r in rows
+    ],
+    use_container_width=True,
+    hide_index=True,
+)
+
+st.divider()
+
+# ── Status changes ──
+st.subheader("Update an invoice")
+u1, u2, u3 = st.columns([2, 1, 1])
+with u1:
+    invoice_no = st.text_input("Invoice #", value="")
+with u2:
+    if st.button("✅ Mark paid"):
+        try:
+            ledger.mark_paid(invoice_no)
+            st.rerun()
+        except LedgerError as e:
+            st.error(str(e))
+with u3:
+    if st.button("🚫 Void"):
+        try:
+            ledger.void(invoice_no)
+            st.rerun()
+        except LedgerError as e:
+            st.error(str(e))
@@ -0,0 +1,107 @@
+# ----------------------------
+# Time-to-first-paint and import-time report
+# ----------------------------
+# Runs each page once in a fresh interpreter under `python -X importtime`
+# (a new session in a cold process), then once more as a second session in
+# the same process (what a page switch costs once modules are loaded).
+# Only imports triggered by the page script itself are counted; Streamlit
+# is imported before the clock starts, as it is in a running server.
+#
+#   python scripts/importtime.py                  # current tree
+#   python scripts/importtime.py --baseline HEAD~1  # compare with a revision
+import argparse
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = ["streamlit_app.py", os.path.join("pages", "1_do_generator.py")]
+START, END = "@@page-start", "@@page-end"
+
+PROBE = """
+import json, sys, time
+sys.path.insert(0, {tree!r})
+from streamlit.testing.v1 import AppTest
+page = {page!r}
+sys.stderr.write({start!r} + "\\n"); sys.stderr.flush()
+t0 = time.perf_counter()
+AppTest.from_file(page, default_timeout=120).run()
+first = time.perf_counter() - t0
+sys.stderr.write({end!r} + "\\n"); sys.stderr.flush()
+t0 = time.perf_counter()
+AppTest.from_file(page, default_timeout=120).run()
+warm = time.perf_counter() - t0
+print(json.dumps({{"first_paint_ms": first * 1000, "warm_session_ms": warm * 1000}}))
+"""
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+def parse_imports(stderr: str):
+    # Top-level imports (shallowest depth) seen while the page ran
+    inside, rows = False, []
+    for line in stderr.splitlines():
+        if line == START:
+            inside = True
+        elif line == END:
+            break
+        elif inside:
+            m = LINE.match(line)
+            if m:
+                rows.append((len(m.group(3)), int(m.group(2)), m.group(4)))
+    if not rows:
+        return 0.0, []
+    depth = min(r[0] for r in rows)
+    top = [(name, us / 1000) for d, us, name in rows if d == depth]
+    return sum(ms for _, ms in top), sorted(top, key=lambda r: -r[1])
+
+def measure(tree: str, page: str) -> dict:
+    code = PROBE.format(tree=tree, page=os.path.join(tree, page), start=START, end=END)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          cwd=tree, capture_output=True, text=True, check=True)
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["import_ms"], result["top_imports"] = parse_imports(proc.stderr)
+    return result
+
+def checkout(rev: str, dest: str) -> str:
+    archive = subprocess.run(["git", "archive", "--format=tar", rev], cwd=ROOT,
+                             capture_output=True, check=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(dest, filter="data")
+    return dest
+
+def report(label: str, tree: str, top: int) -> dict:
+    out = {}
+    print(f"== {label}")
+    for page in PAGES:
+        r = measure(tree, page)
+        out[page] = r
+        print(f"  {page}")
+        print(f"    first paint   {r['first_paint_ms']:8.1f} ms"
+              f"   (page imports {r['import_ms']:.1f} ms)")
+        print(f"    warm session  {r['warm_session_ms']:8.1f} ms")
+        for name, ms in r["top_imports"][:top]:
+            print(f"      {ms:8.1f} ms  {name}")
+    return out
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Page import-time report")
+    ap.add_argument("--baseline", help="git revision to measure for comparison")
+    ap.add_argument("--top", type=int, default=8, help="imports listed per page")
+    args = ap.parse_args(argv)
+
+    current = report("working tree", ROOT, args.top)
+    if args.baseline:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = report(f"baseline {args.baseline}", checkout(args.baseline, tmp), args.top)
+        print("== first paint, baseline -> working tree")
+        for page in PAGES:
+            b, c = base[page]["first_paint_ms"], current[page]["first_paint_ms"]
+            print(f"  {page:32} {b:8.1f} -> {c:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+# ----------------------------
+# Concurrent-session load test for the Streamlit pages
+# ----------------------------
+# Drives streamlit_app.py and pages/1_do_generator.py through scripted
+# editing sessions with Streamlit's AppTest. Each simulated clerk gets its
+# own AppTest (own session state) on its own thread, so all sessions stay
+# alive in this one process at once. AppTest swaps process-wide runtime
+# globals while a rerun executes, so the reruns themselves take turns;
+# rerun latency therefore includes the wait behind other sessions, which
+# is what a clerk sees when one GIL-bound server process is saturated.
+# Both pages hand the download button a callable that AppTest never
+# invokes, so each session ends by building the PDF itself from its
+# session state, as a click would; renders_per_s counts those PDFs.
+# Drafts, journals and spill files go to a temporary MAKK_DATA_DIR that
+# is removed afterwards, never to the app's data/.
+#
+#   python scripts/loadtest.py --sessions 1,4,16,32 --rounds 3
+import argparse
+import json
+import os
+import random
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Before anything imports makk.config
+DATA_DIR = os.environ["MAKK_DATA_DIR"] = tempfile.mkdtemp(prefix="makk-loadtest-")
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+INVOICE_PAGE = os.path.join(ROOT, "streamlit_app.py")
+DO_PAGE = os.path.join(ROOT, "pages", "1_do_generator.py")
+
+# ----------------------------
+# Helpers
+# ----------------------------
+def rss_mb() -> float:
+    # Current RSS from /proc when available, else peak RSS
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def percentile(values, p: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[p - 1]
+
+def widget(elements, label):
+    for w in elements:
+        if w.label == label:
+            return w
+    raise LookupError(f"no widget labelled {label!r}")
+
+_RUN_LOCK = threading.Lock()
+
+class Session:
+    # One simulated clerk; every rerun is timed
+    def __init__(self, path: str, timeout: float):
+        self.at = AppTest.from_file(path, default_timeout=timeout)
+        self.latencies = []
+        self.renders = 0
+        self.errors = 0
+
+    def run(self):
+        t0 = time.perf_counter()
+        with _RUN_LOCK:
+            self.at.run()
+        self.latencies.append(time.perf_counter() - t0)
+        if self.at.exception:
+            self.errors += 1
+
+    def download(self, label: str, build):
+        # Click the download: build(session_state) renders the PDF the
+        # page's deferred callable would have returned
+        if not any(el.proto.label == label for el in self.at.get("download_button")):
+            self.errors += 1
+            return
+        try:
+            pdf = build(self.at.session_state).getvalue()
+        except Exception:
+            self.errors += 1
+            return
+        if pdf.startswith(b"%PDF"):
+            self.renders += 1
+        else:
+            self.errors += 1
+
+def invoice_pdf(state):
+    from makk.invoice_pdf import build_pdf
+    from makk.lineitems import invoice_data, to_rows
+    from makk.sessions import drafts
+    rows = to_rows(drafts.get(state["draft_id"]))
+    return build_pdf(invoice_data(state, rows), deterministic=True)
+
+def do_pdf(state):
+    from makk.do_pdf import build_pdf
+    return build_pdf(dict(state["do_values"]), deterministic=True)
+
+# ----------------------------
+# Scripted sessions
+# ----------------------------
+def invoice_session(rng: random.Random, timeout: float, items: int) -> Session:
+    s = Session(INVOICE_PAGE, timeout)
+    s.run()
+    customers = s.at.selectbox(key="customer_dropdown").options
+    s.at.selectbox(key="customer_dropdown").select(rng.choice(customers[1:]))
+    s.run()
+    widget(s.at.text_input, "Invoice #").input(f"INV-{rng.randint(1000, 9999)}")
+    s.run()
+    for _ in range(items):
+        widget(s.at.button, "➕ Add line item").click()
+        s.run()
+    widget(s.at.text_area, "Address").input("1234 SAMPLE ST\nCITY OF INDUSTRY, CA 91746")
+    s.run()
+    s.download("⬇️ Download PDF", invoice_pdf)
+    return s
+
+# (widget kind, label, value, key of the section's save button)
+DO_FIELDS = [
+    ("text_input", "Issued By", "OPS", "save_header"),
+    ("text_input", "MAWB No.", "160-12345678", None),
+    ("text_input", "HAWB No.", "HB0001", None),
+    ("text_input", "Shipper", "SAMPLE SHIPPER CO.", None),
+    ("text_input", "Consignee", "SAMPLE CONSIGNEE INC.", None),
+    ("text_input", "Trucker Name", "SAMPLE TRUCKING", "save_references"),
+    ("text_area", "Freight Pick Up Location", "WAREHOUSE 7\n1 PORT WAY\nLONG BEACH, CA", None),
+    ("text_area", "Delivery To", "CUSTOMER DC\n99 INDUSTRY RD\nONTARIO, CA", "save_locations"),
+    ("text_area", "Instruction", "CALL 1 HR BEFORE DELIVERY. " * 6, "save_pod"),
+]
+
+def do_session(rng: random.Random, timeout: float, items: int) -> Session:
+    # DO sections are forms: typing is client-side, saving a section reruns
+    s = Session(DO_PAGE, timeout)
+    s.run()
+    for kind, label, value, save in DO_FIELDS:
+        widget(getattr(s.at, kind), label).input(value)
+        if save:
+            s.at.button(key=save).click()
+            s.run()
+    s.download("⬇️ Download Delivery Order PDF", do_pdf)
+    return s
+
+SCENARIOS = {"invoice": invoice_session, "do": do_session}
+
+# ----------------------------
+# Runner
+# ----------------------------
+def run_level(n: int, rounds: int, args) -> dict:
+    latencies, errors, renders = [], 0, 0
+    lock = threading.Lock()
+
+    def clerk(i: int):
+        nonlocal errors, renders
+        rng = random.Random(i)
+        for r in range(rounds):
+            name = args.scenario if args.scenario != "mixed" else ("invoice", "do")[(i + r) % 2]
+            s = SCENARIOS[name](rng, args.timeout, args.items)
+            with lock:
+                latencies.extend(s.latencies)
+                errors += s.errors
+                renders += s.renders
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        list(pool.map(clerk, range(n)))
+    wall = time.perf_counter() - t0
+
+    ms = [x * 1000 for x in latencies]
+    return {
+        "sessions": n,
+        "reruns": len(ms),
+        "errors": errors,
+        "p50_ms": round(percentile(ms, 50), 1),
+        "p95_ms": round(percentile(ms, 95), 1),
+        "p99_ms": round(percentile(ms, 99), 1),
+        "renders_per_s": round(renders / wall, 1) if wall else 0.0,
+        "rss_mb": round(rss_mb(), 1),
+    }
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Concurrent AppTest load test")
+    ap.add_argument("--sessions", default="1,4,16,32",
+                    help="comma-separated concurrent session counts")
+    ap.add_argument("--rounds", type=int, default=2,
+                    help="scripted sessions per simulated clerk")
+    ap.add_argument("--scenario", choices=["invoice", "do", "mixed"], default="mixed")
+    ap.add_argument("--items", type=int, default=5,
+                    help="line items added per invoice session")
+    ap.add_argument("--timeout", type=float, default=60.0,
+                    help="per-rerun timeout in seconds")
+    ap.add_argument("--json", action="store_true", help="print results as JSON lines")
+    args = ap.parse_args(argv)
+
+    cols = ["sessions", "reruns", "errors", "p50_ms", "p95_ms", "p99_ms",
+            "renders_per_s", "rss_mb"]
+    if not args.json:
+        print("  ".join(f"{c:>13}" for c in cols))
+    try:
+        for n in [int(x) for x in args.sessions.split(",") if x.strip()]:
+            row = run_level(n, args.rounds, args)
+            if args.json:
+                print(json.dumps(row), flush=True)
+            else:
+                print("  ".join(f"{row[c]:>13}" for c in cols), flush=True)
+    finally:
+        if "makk.journal" in sys.modules:
+            sys.modules["makk.journal"].get_journal().flush()
+        shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# ----------------------------
+# Reproducible-PDF regression corpus
+# ----------------------------
+# Renders every case in scripts/pdf_corpus/cases.json in deterministic mode,
+# twice in this process and once in each of several fresh interpreters
+# (different PYTHONHASHSEED), and checks that every run gives the same
+# SHA-256 and that it matches the recorded hash in hashes.json.
+#
+#   python scripts/pdf_corpus.py            # check
+#   python scripts/pdf_corpus.py --write    # re-record hashes after a layout change
+#
+# Hashes depend on the ReportLab version, which is recorded with them.
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS = os.path.join(ROOT, "scripts", "pdf_corpus")
+CASES = os.path.join(CORPUS, "cases.json")
+HASHES = os.path.join(CORPUS, "hashes.json")
+DATE_KEYS = ("inv_date", "issued_at")
+
+sys.path.insert(0, ROOT)
+
+
+def load_cases() -> dict:
+    with open(CASES, encoding="utf-8") as f:
+        cases = json.load(f)
+    for case in cases.values():
+        for k in DATE_KEYS:
+            if k in case["data"]:
+                case["data"][k] = date.fromisoformat(case["data"][k])
+    return cases
+
+
+def render(kind: str, data: dict) -> bytes:
+    if kind == "invoice":
+        from makk.invoice_pdf import build_pdf
+    else:
+        from makk.do_pdf import build_pdf
+    return build_pdf(data, deterministic=True).getvalue()
+
+
+def hash_all(cases: dict) -> dict:
+    return {name: hashlib.sha256(render(c["kind"], c["data"])).hexdigest()
+            for name, c in cases.items()}
+
+
+def hash_in_subprocess(seed: int) -> dict:
+    env = dict(os.environ, PYTHONHASHSEED=str(seed))
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--emit"],
+                         env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(out)
+
+
+def reportlab_version() -> str:
+    import reportlab
+    return reportlab.Version
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Check deterministic PDFs against recorded hashes")
+    ap.add_argument("--write", action="store_true", help="record current hashes in hashes.json")
+    ap.add_argument("--processes", type=int, default=3, help="fresh interpreters to compare")
+    ap.add_argument("--emit", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    cases = load_cases()
+    if args.emit:
+        print(json.dumps(hash_all(cases)))
+        return
+
+    runs = {"in-process #1": hash_all(cases), "in-process #2": hash_all(cases)}
+    for seed in range(args.processes):
+        runs[f"subprocess seed={seed}"] = hash_in_subprocess(seed)
+    current = runs["in-process #1"]
+
+    failures = 0
+    for label, hashes in runs.items():
+        for name, h in hashes.items():
+            if h != current[name]:
+                print(f"NONDETERMINISTIC {name}: {label} gave {h[:16]}, expected {current[name][:16]}")
+                failures += 1
+    if failures:
+        sys.exit(1)
+
+    if args.write:
+        with open(HASHES, "w", encoding="utf-8") as f:
+            json.dump({"reportlab": reportlab_version(), "hashes": current}, f, indent=2)
+            f.write("\n")
+        print(f"recorded {len(current)} hash(es) from {len(runs)} identical run(s)")
+        return
+
+    with open(HASHES, encoding="utf-8") as f:
+        recorded = json.load(f)
+    if recorded["reportlab"] != reportlab_version():
+        print(f"note: hashes were recorded with ReportLab {recorded['reportlab']}, "
+              f"running {reportlab_version()}")
+    for name in sorted(set(current) | set(recorded["hashes"])):
+        want, got = recorded["hashes"].get(name), current.get(name)
+        if want != got:
+            print(f"CHANGED {name}: recorded {str(want)[:16]}, got {str(got)[:16]}")
+            failures += 1
+        else:
+            print(f"ok      {name}  {got[:16]}")
+    print(f"{len(current) - failures}/{len(current)} case(s) match across {len(runs)} run(s)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# ----------------------------
+# Local stand-in SMTP server
+# ----------------------------
+# Accepts mail on localhost and counts it instead of delivering, so the
+# outbox can be exercised end to end without a real mail server:
+#
+#   python scripts/smtp_sink.py --port 2525 &
+#   MAKK_SMTP_PORT=2525 python -m makk.outbox --once
+#
+# --fail-every N answers every Nth message with a temporary 451 error to
+# exercise retries; --reject ADDR answers RCPT TO that address with a
+# permanent 550; --save DIR writes each message there as an .eml file.
+import argparse
+import os
+import socketserver
+import threading
+import time
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.messages = 0
+        self.rejected = 0
+
+
+class SinkHandler(socketserver.StreamRequestHandler):
+    def reply(self, line: str):
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self):
+        server = self.server
+        with server.stats.lock:
+            server.stats.connections += 1
+        self.reply("220 smtp-sink ready")
+        rcpts = []
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            cmd = raw.decode("utf-8", "replace").strip()
+            verb = cmd[:4].upper()
+            if verb in ("EHLO", "HELO"):
+                self.wfile.write(b"250-smtp-sink\r\n250-8BITMIME\r\n250 SIZE 52428800\r\n")
+            elif verb == "MAIL":
+                rcpts = []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                rcpt = cmd[8:].strip()
+                if rcpt.strip("<>").lower() in server.reject:
+                    self.reply("550 No such user")
+                    continue
+                rcpts.append(rcpt)
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    line = self.rfile.readline()
+                    if not line or line in (b".\r\n", b".\n"):
+                        break
+                    lines.append(line[1:] if line.startswith(b"..") else line)
+                with server.stats.lock:
+                    n = server.stats.messages + server.stats.rejected + 1
+                    fail = server.fail_every and n % server.fail_every == 0
+                    if fail:
+                        server.stats.rejected += 1
+                    else:
+                        server.stats.messages += 1
+                if fail:
+                    self.reply("451 Temporary failure, try again")
+                    continue
+                if server.save_dir:
+                    path = os.path.join(server.save_dir, f"{time.time_ns()}.eml")
+                    with open(path, "wb") as f:
+                        f.writelines(lines)
+                self.reply("250 OK queued")
+            elif verb in ("RSET", "NOOP"):
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class SinkServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, addr, fail_every: int = 0, save_dir: str = None, reject=()):
+        super().__init__(addr, SinkHandler)
+        self.stats = Stats()
+        self.fail_every = fail_every
+        self.save_dir = save_dir
+        self.reject = {a.lower() for a in reject}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Stand-in SMTP server that counts mail")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=2525)
+    ap.add_argument("--fail-every", type=int, default=0)
+    ap.add_argument("--save", help="directory to write received messages to")
+    ap.add_argument("--reject", action="append", default=[], metavar="ADDR",
+                    help="refuse this recipient with a 550 (repeatable)")
+    args = ap.parse_args(argv)
+
+    if args.save:
+        os.makedirs(args.save, exist_ok=True)
+    server = SinkServer((args.host, args.port), args.fail_every, args.save, args.reject)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"smtp-sink listening on {args.host}:{args.port}", flush=True)
+    try:
+        while True:
+            time.sleep(10)
+            s = server.stats
+            print(f"connections={s.connections} messages={s.messages} rejected={s.rejected}",
+                  flush=True)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
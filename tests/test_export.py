@@ -0,0 +1,87 @@
+import csv
+import json
+from datetime import date
+
+import pytest
+
+from makk.export import Exporter
+from makk.ledger import Ledger
+
+
+def issue(ledger, n):
+    for i in range(n):
+        ledger.issue({
+            "inv_date": date(2026, 1 + i % 12, 1 + i % 28),
+            "invoice_no": f"INV-{i:04d}",
+            "customer_id": f"C{i % 3}",
+            "receiver": "SAMPLE CONSIGNEE INC.",
+            "phone": "",
+            "address": "1 PORT WAY\nLONG BEACH, CA",   # embedded newline in a CSV field
+            "items": [{"Qty": j + 1, "Description": f"Item {j}", "Weight": "10",
+                       "Unit": "LB", "Line Total (USD)": 12.5 * (j + 1)}
+                      for j in range(i % 4)],
+            "sales_tax": 1.25,
+        })
+
+
+@pytest.mark.parametrize("fmt", ["csv", "jsonl"])
+def test_resumed_export_matches_uninterrupted(tmp_path, fmt):
+    db_path = str(tmp_path / "makk.db")
+    issue(Ledger(db_path), 23)
+
+    crashing = Exporter(db_path)
+    calls = 0
+    real = crashing.ledger.issued_between
+
+    def issued_between(*args):
+        nonlocal calls
+        calls += 1
+        if calls == 3:
+            raise RuntimeError("crash")
+        return real(*args)
+
+    crashing.ledger.issued_between = issued_between
+    with pytest.raises(RuntimeError):
+        crashing.run("resumed", fmt, str(tmp_path / "a"), chunk=5)
+    assert crashing.status()[0]["run"]["done_id"] == 10
+
+    resumed = Exporter(db_path).run("resumed", fmt, str(tmp_path / "a"), chunk=5)
+    fresh = Exporter(db_path).run("fresh", fmt, str(tmp_path / "b"), chunk=5)
+
+    assert resumed["resumed"] and not fresh["resumed"]
+    with open(resumed["path"], "rb") as a, open(fresh["path"], "rb") as b:
+        assert a.read() == b.read()
+    assert resumed["invoices"] == fresh["invoices"] == 23
+    assert resumed["rows"] == fresh["rows"]
+    assert Exporter(db_path).run("resumed", fmt, str(tmp_path / "a")) is None
+
+
+@pytest.mark.parametrize("fmt", ["csv", "jsonl"])
+def test_voided_invoices_reach_accounting(tmp_path, fmt):
+    db_path = str(tmp_path / "makk.db")
+    ledger = Ledger(db_path)
+    issue(ledger, 3)
+    ledger.void("INV-0001")            # voided before the first export
+    ex = Exporter(db_path)
+    out = str(tmp_path / "out")
+
+    first = ex.run(None, fmt, out)
+    if fmt == "csv":
+        with open(first["path"], newline="", encoding="utf-8") as f:
+            status = {r["invoice_no"]: r["status"] for r in csv.DictReader(f)}
+    else:
+        with open(first["path"], encoding="utf-8") as f:
+            status = {inv["invoice_no"]: inv["status"] for inv in map(json.loads, f)}
+    assert status == {"INV-0000": "issued", "INV-0001": "void", "INV-0002": "issued"}
+    changes = ex.run_changes(None, fmt, out)
+    assert changes["changes"] == 1 and ex.run_changes(None, fmt, out) is None
+
+    ledger.mark_paid("INV-0000")       # changes to invoices already exported
+    ledger.void("INV-0002")
+    assert ex.run(None, fmt, out) is None
+    changes = ex.run_changes(None, fmt, out)
+    assert (changes["from_seq"], changes["to_seq"], changes["changes"]) == (2, 3, 2)
+    with open(changes["path"], newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f)) if fmt == "csv" else [json.loads(line) for line in f]
+    assert [(r["invoice_no"], r["status"]) for r in rows] == \
+        [("INV-0000", "paid"), ("INV-0002", "void")]
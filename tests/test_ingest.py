@@ -0,0 +1,56 @@
+import csv
+import os
+
+from makk import ingest
+from makk.ingest import Ingestor
+
+HEADER = ["invoice_no", "inv_date", "customer_id", "receiver", "sales_tax",
+          "qty", "description", "unit", "line_total"]
+
+
+def write_manifest(path, invoices):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(HEADER)
+        for no, lines in invoices.items():
+            for desc, amount in lines:
+                w.writerow([no, "2026-03-01", "C1", "SAMPLE CONSIGNEE INC.", "0",
+                            "1", desc, "LB", amount])
+
+
+def test_only_changed_documents_render(tmp_path):
+    watch = tmp_path / "manifests"
+    watch.mkdir()
+    manifest = watch / "march.csv"
+    invoices = {f"INV-{i}": [("PALLET", "100"), ("CRATE", "25.5")] for i in range(5)}
+    write_manifest(manifest, invoices)
+    ing = Ingestor(str(watch), db_path=str(tmp_path / "makk.db"))
+
+    counts = ing.sync(str(manifest))
+    assert counts == {"rendered": 5, "reused": 0, "retired": 0, "failed": 0}
+    out = watch / "rendered" / "march.csv"
+    assert sorted(os.listdir(out)) == [f"INV-{i}.pdf" for i in range(5)]
+    before = {n: (out / n).read_bytes() for n in os.listdir(out)}
+
+    invoices["INV-2"][1] = ("CRATE", "30")      # one row changed
+    del invoices["INV-4"]                       # one invoice removed
+    write_manifest(manifest, invoices)
+    counts = Ingestor(str(watch), db_path=str(tmp_path / "makk.db")).sync(str(manifest))
+    assert counts == {"rendered": 1, "reused": 3, "retired": 1, "failed": 0}
+    assert (out / "retired" / "INV-4.pdf").exists()
+    assert not (out / "INV-4.pdf").exists()
+    assert (out / "INV-2.pdf").read_bytes() != before["INV-2.pdf"]
+    assert (out / "INV-0.pdf").read_bytes() == before["INV-0.pdf"]
+
+
+def test_config_or_logo_change_rerenders(tmp_path, monkeypatch):
+    watch = tmp_path / "manifests"
+    watch.mkdir()
+    manifest = watch / "march.csv"
+    write_manifest(manifest, {"INV-1": [("PALLET", "100")], "INV-2": [("CRATE", "5")]})
+    db_path = str(tmp_path / "makk.db")
+    assert Ingestor(str(watch), db_path=db_path).sync(str(manifest))["rendered"] == 2
+
+    monkeypatch.setattr(ingest.assets, "logo_bytes", lambda: b"another logo")
+    assert Ingestor(str(watch), db_path=db_path).sync(str(manifest))["rendered"] == 2
+    assert "config.py" in ingest._LAYOUT_FILES
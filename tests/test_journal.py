@@ -0,0 +1,65 @@
+import errno
+import os
+import time
+import uuid
+
+from makk import lineitems
+from makk.journal import Journal, cell, count, field, snapshot
+
+
+def test_replay_skips_torn_last_line(tmp_path):
+    draft_id = uuid.uuid4().hex
+    journal = Journal(str(tmp_path), flush_s=0)
+    journal.append("invoice", draft_id, [field("invoice_no", "INV-1")],
+                   initial=lambda: snapshot({"invoice_no": "", "note": "hi"},
+                                            [lineitems.LineItem()]))
+    journal.append("invoice", draft_id, [field("invoice_no", "INV-2"), count(2),
+                                         cell(1, "Description", "PALLET")])
+    journal.flush()
+
+    path = tmp_path / f"invoice-{draft_id}.jsonl"
+    with open(path, "ab") as f:
+        f.write(b'{"f":"invoice_no","v":"INV-')   # crash mid-write
+
+    # a fresh process replays the intact records and ignores the torn one
+    draft = Journal(str(tmp_path)).replay("invoice", draft_id)
+    assert draft.fields == {"invoice_no": "INV-2", "note": "hi"}
+    assert [r.row()["Description"] for r in draft.items] == ["", "PALLET"]
+
+    # appends after the torn tail start on a new line and replay normally
+    journal = Journal(str(tmp_path), flush_s=0)
+    journal.append("invoice", draft_id, [field("note", "after crash")])
+    journal.flush()
+    draft = Journal(str(tmp_path)).replay("invoice", draft_id)
+    assert draft.fields == {"invoice_no": "INV-2", "note": "after crash"}
+    assert len(draft.items) == 2
+
+
+def test_failed_fsync_keeps_records_and_writer(tmp_path, monkeypatch):
+    draft_id = uuid.uuid4().hex
+    journal = Journal(str(tmp_path), flush_s=0.01)
+    journal.append("do", draft_id, [field("shipper", "ACME")], initial=lambda: snapshot({}))
+    journal.flush()
+
+    real_fsync = os.fsync
+
+    def full_disk(fd):
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    monkeypatch.setattr(os, "fsync", full_disk)
+    journal.append("do", draft_id, [field("shipper", "ACME LOGISTICS")])
+    deadline = time.time() + 5
+    while journal.error is None and time.time() < deadline:
+        time.sleep(0.01)
+    assert "No space left" in journal.error
+    assert journal._writer.is_alive()
+
+    monkeypatch.setattr(os, "fsync", real_fsync)
+    journal.append("do", draft_id, [field("carrier", "SAMPLE TRUCKING")])
+    deadline = time.time() + 5
+    while journal.error is not None and time.time() < deadline:
+        time.sleep(0.01)
+    assert journal.error is None
+
+    draft = Journal(str(tmp_path)).replay("do", draft_id)
+    assert draft.fields == {"shipper": "ACME LOGISTICS", "carrier": "SAMPLE TRUCKING"}
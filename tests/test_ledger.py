@@ -0,0 +1,60 @@
+import random
+from datetime import date
+
+from makk.ledger import PAID, VOID, Ledger
+
+
+def test_incremental_aggregates_match_rebuild(tmp_path):
+    ledger = Ledger(str(tmp_path / "makk.db"))
+    rng = random.Random(7)
+    numbers = []
+    for i in range(60):
+        no = f"INV-{i:04d}"
+        ledger.issue({
+            "inv_date": date(2026, rng.randint(1, 6), rng.randint(1, 28)),
+            "invoice_no": no,
+            "customer_id": rng.choice(["Falcon01", "Baixin 01", "Paradigm01"]),
+            "receiver": "", "phone": "", "address": "",
+            "items": [{"Qty": 1, "Description": "", "Weight": "", "Unit": "LB",
+                       "Line Total (USD)": round(rng.uniform(0, 500), 2)}
+                      for _ in range(rng.randint(0, 3))],
+            "sales_tax": round(rng.uniform(0, 20), 2),
+        })
+        numbers.append(no)
+    for no in rng.sample(numbers, 25):
+        ledger.set_status(no, PAID)
+    for no in rng.sample(numbers, 10):
+        ledger.set_status(no, VOID)
+
+    assert ledger.check() == []
+    before = ledger.totals()
+    ledger.rebuild()
+    assert ledger.totals() == before
+    assert sum(r["n_invoices"] for r in before) == 60
+
+
+def test_check_reports_drift(tmp_path):
+    ledger = Ledger(str(tmp_path / "makk.db"))
+    ledger.issue({"inv_date": date(2026, 3, 1), "invoice_no": "INV-1", "customer_id": "C1",
+                  "receiver": "", "phone": "", "address": "",
+                  "items": [{"Qty": 1, "Description": "", "Weight": "", "Unit": "LB",
+                             "Line Total (USD)": 10.0}], "sales_tax": 0.5})
+    with ledger.conn:
+        ledger.conn.execute("UPDATE revenue_agg SET total = total + 1")
+    assert ledger.check() == [(("C1", "2026-03", "issued"), (1, 1000, 50, 1051),
+                               (1, 1000, 50, 1050))]
+    ledger.rebuild()
+    assert ledger.check() == []
+
+
+def test_status_filter(tmp_path):
+    ledger = Ledger(str(tmp_path / "makk.db"))
+    for no in ("INV-1", "INV-2"):
+        ledger.issue({"inv_date": date(2026, 3, 1), "invoice_no": no, "customer_id": "C1",
+                      "receiver": "", "phone": "", "address": "",
+                      "items": [{"Qty": 1, "Description": "", "Weight": "", "Unit": "LB",
+                                 "Line Total (USD)": 10.0}], "sales_tax": 0})
+    ledger.void("INV-2")
+    assert ledger.totals(group_by=(), statuses=[]) == []
+    assert ledger.totals(group_by=(), statuses=["issued", "paid"])[0]["n_invoices"] == 1
+    assert ledger.totals(group_by=())[0]["n_invoices"] == 2
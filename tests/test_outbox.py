@@ -0,0 +1,140 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+from makk.outbox import FAILED, QUEUED, SENDING, SENT, Outbox, SmtpPool
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "scripts"))
+from smtp_sink import SinkServer  # noqa: E402
+
+PDF = b"%PDF-1.4 test"
+
+
+@pytest.fixture
+def sink():
+    servers = []
+
+    def start(fail_every=0, reject=()):
+        server = SinkServer(("127.0.0.1", 0), fail_every, None, reject)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def outbox(tmp_path, server, **kw):
+    pool = SmtpPool("127.0.0.1", server.server_address[1], size=kw.pop("pool_size", 2))
+    return Outbox(str(tmp_path / "makk.db"), pool=pool, **kw)
+
+
+def rows(box):
+    return {r["id"]: dict(r) for r in box.conn.execute("SELECT * FROM outbox")}
+
+
+def make_due(box):
+    with box.conn:
+        box.conn.execute("UPDATE outbox SET next_attempt_at = 0 WHERE status = ?", (QUEUED,))
+
+
+def test_batches_reuse_pooled_connections(tmp_path, sink):
+    server = sink()
+    box = outbox(tmp_path, server, batch_size=5)
+    for i in range(12):
+        box.enqueue(PDF, f"doc{i}.pdf", [f"a{i}@example.com", f"b{i}@example.com"], "Invoice")
+    assert box.dispatch() == 24
+    assert server.stats.messages == 24
+    assert box.pool.opened <= box.pool.size
+    assert server.stats.connections <= box.pool.size
+    assert box.status_counts() == {SENT: 24}
+
+
+def test_temporary_failures_back_off_then_fail(tmp_path, sink):
+    box = outbox(tmp_path, sink(fail_every=1), retry_base_s=10, max_attempts=3)
+    (row_id,) = box.enqueue(PDF, "doc.pdf", ["a@example.com"], "Invoice")
+    for attempt, backoff in ((1, 10), (2, 20)):
+        t0 = time.time()
+        assert box.dispatch() == 0
+        r = rows(box)[row_id]
+        assert (r["status"], r["attempts"]) == (QUEUED, attempt)
+        assert r["last_error"].startswith("451")
+        assert t0 + backoff <= r["next_attempt_at"] <= time.time() + backoff
+        assert box.dispatch() == 0 and rows(box)[row_id]["attempts"] == attempt   # not due yet
+        make_due(box)
+    box.dispatch()
+    assert (rows(box)[row_id]["status"], rows(box)[row_id]["attempts"]) == (FAILED, 3)
+
+
+def test_temporary_failure_is_retried_to_delivery(tmp_path, sink):
+    server = sink(fail_every=2)
+    box = outbox(tmp_path, server, pool_size=1)
+    box.enqueue(PDF, "doc.pdf", ["a@example.com", "b@example.com"], "Invoice")
+    assert box.dispatch() == 1
+    make_due(box)
+    assert box.dispatch() == 1
+    assert box.status_counts() == {SENT: 2}
+    assert server.stats.messages == 2 and server.stats.rejected == 1
+
+
+def test_refused_recipient_fails_without_retry(tmp_path, sink):
+    box = outbox(tmp_path, sink(reject=["nobody@example.com"]))
+    ok, refused = box.enqueue(PDF, "doc.pdf", ["a@example.com", "nobody@example.com"], "DO")
+    assert box.dispatch() == 1
+    r = rows(box)
+    assert r[ok]["status"] == SENT
+    assert (r[refused]["status"], r[refused]["attempts"]) == (FAILED, 1)
+    assert r[refused]["last_error"].startswith("refused")
+
+
+def test_rate_limit_is_shared_between_senders(tmp_path, sink):
+    server = sink()
+    first = outbox(tmp_path, server, rate_per_recipient=3)
+    second = outbox(tmp_path, server, rate_per_recipient=3)
+    for i in range(5):
+        first.enqueue(PDF, f"doc{i}.pdf", ["Clerk@Example.com" if i % 2 else "clerk@example.com"],
+                      "Invoice")
+    first.enqueue(PDF, "other.pdf", ["other@example.com"], "Invoice")
+    t0 = time.time()
+    assert first.dispatch() == 4
+    assert second.dispatch() == 0   # a separate process sees the same sends
+    deferred = [r for r in rows(first).values() if r["status"] == QUEUED]
+    assert len(deferred) == 2
+    assert all(t0 + 59 <= r["next_attempt_at"] <= time.time() + 60 for r in deferred)
+
+
+def test_only_expired_leases_are_requeued(tmp_path, sink):
+    box = outbox(tmp_path, sink(), lease_s=60)
+    live, stale = box.enqueue(PDF, "doc.pdf", ["a@example.com", "b@example.com"], "Invoice")
+    now = time.time()
+    with box.conn:
+        box.conn.execute("UPDATE outbox SET status = ?, claimed_at = ? WHERE id = ?",
+                         (SENDING, now, live))
+        box.conn.execute("UPDATE outbox SET status = ?, claimed_at = ? WHERE id = ?",
+                         (SENDING, now - 120, stale))
+    assert box.dispatch() == 1
+    r = rows(box)
+    assert r[live]["status"] == SENDING and r[stale]["status"] == SENT
+
+
+def test_prune_deletes_finished_documents(tmp_path, sink):
+    box = outbox(tmp_path, sink(), retention_s=3600)
+    box.enqueue(PDF, "old.pdf", ["a@example.com"], "Invoice")
+    box.dispatch()
+    box.enqueue(PDF, "old-queued.pdf", ["b@example.com"], "Invoice")
+    with box.conn:
+        box.conn.execute("UPDATE outbox_docs SET created_at = created_at - 7200")
+        box.conn.execute("UPDATE outbox SET next_attempt_at = next_attempt_at + 7200"
+                         " WHERE status = ?", (QUEUED,))
+    box.enqueue(PDF, "new.pdf", ["c@example.com"], "Invoice")
+    box.dispatch()
+    assert box.prune() == 1
+    names = [r[0] for r in box.conn.execute("SELECT file_name FROM outbox_docs ORDER BY id")]
+    assert names == ["old-queued.pdf", "new.pdf"]
+    assert box.status_counts() == {QUEUED: 1, SENT: 1}
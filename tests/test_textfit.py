@@ -0,0 +1,52 @@
+from makk.textfit import ELLIPSIS, SIZE_STEP, fit_text, paragraphs, word_width, wrap_lines
+
+FONT = "Helvetica"
+LEADING = 1.2
+
+
+def fits(text, size, max_w, max_h):
+    lines, overflow = wrap_lines(paragraphs(text), FONT, size, max_w)
+    return not overflow and (len(lines) - 1) * LEADING * size <= max_h
+
+
+def width(line, size):
+    return word_width(line, FONT) * size
+
+
+def test_text_that_fits_keeps_the_requested_size():
+    assert fit_text("ACME LOGISTICS", FONT, 200, 30, 10, 6, LEADING) == (10, ["ACME LOGISTICS"])
+
+
+def test_long_text_shrinks_to_largest_fitting_step():
+    text = "SHENZHEN BAIXIN INTERNATIONAL LOGISTICS CO., LTD. HUANGSHAN BRANCH " * 2
+    max_w, max_h = 180, 24
+    size, lines = fit_text(text, FONT, max_w, max_h, 12, 6, LEADING)
+
+    assert 6 <= size < 12
+    assert ((size - 6) / SIZE_STEP).is_integer()
+    assert fits(text, size, max_w, max_h)
+    assert not fits(text, size + SIZE_STEP, max_w, max_h)
+    assert lines == wrap_lines(paragraphs(text), FONT, size, max_w)[0]
+
+
+def test_min_size_cuts_extra_lines_with_an_ellipsis():
+    text = "PLEASE CALL ONE HOUR BEFORE DELIVERY " * 40
+    max_w, max_h = 120, 10
+    size, lines = fit_text(text, FONT, max_w, max_h, 10, 6, LEADING)
+
+    assert size == 6
+    assert len(lines) == int(max_h / (LEADING * 6)) + 1
+    assert lines[-1].endswith(ELLIPSIS)
+    assert all(width(line, size) <= max_w for line in lines)
+
+
+def test_word_wider_than_the_box_is_clipped():
+    word = "SUPERCALIFRAGILISTICEXPIALIDOCIOUSWAREHOUSE"
+    max_w = 60
+    size, lines = fit_text(word, FONT, max_w, 100, 10, 6, LEADING)
+
+    assert size == 6
+    assert len(lines) == 1
+    assert lines[0].endswith(ELLIPSIS)
+    assert word.startswith(lines[0][:-len(ELLIPSIS)])
+    assert width(lines[0], size) <= max_w